@@ -5,10 +5,13 @@ import (
 	"flag"
 	"fmt"
 	"io/ioutil"
+	"math/bits"
 	"math/rand"
 	"net/http"
 	"os"
 	"os/exec"
+	"sort"
+	"strconv"
 	"strings"
 	"text/template"
 	"time"
@@ -25,16 +28,22 @@ var (
 	numInvoke   = flag.Int("n", 10, "Number of invocations")
 	numWarm     = flag.Int("w", 0, "Number of invocations for warming")
 	delay       = flag.Int("delay", 0, "Add a delay between sending requests (us)")
+	rate        = flag.Int("rate", 0, "Send at most this many requests per second in total while measuring (0: closed loop)")
 	logfile     = flag.String("logging", "", "Log to file instead of standart out")
 	m5_enable   = flag.Bool("m5ops", false, "Enable m5 magic instructions")
 	m5_interval = flag.Int("m5iv", 0, "Invertal to issue a m5 workend instruction")
 	verbose     = flag.Bool("v", false, "Print verbose output")
 	mulitclient = flag.Bool("mulitclient", false, "Print verbose output")
+	histfile    = flag.String("hist", "", "Write a histogram of the measured request latencies to this file")
 
 	// Client
 	_client    *http.Client
 	requestURL = ""
 	_measure   = false
+	// Ticks at the request rate. Each request waits for a tick.
+	pacer <-chan time.Time
+	// Latencies of the measured requests
+	latencies = NewHistogram()
 )
 
 func main() {
@@ -82,8 +91,7 @@ func main() {
 	time.Sleep(1 * time.Second)
 	// Run the actual jobs
 	if *m5_enable {
-		cmd := exec.Command("/usr/local/bin/m5", "fail", "4")
-		cmd.Run()
+		m5op("fail", "4")
 	}
 	start = time.Now()
 	r, nb = runJobs(_client, rjobs, false)
@@ -93,8 +101,113 @@ func main() {
 	str += fmt.Sprintf("Time elapsed:\t\t %f sec.\n", time.Since(start).Seconds())
 	str += fmt.Sprintf("Transaction rate:\t %f trans/s\n", float64(r)/time.Since(start).Seconds())
 	str += fmt.Sprintf("Throughput:\t\t %f MB/s\n", float64(nb)/1024/1024/time.Since(start).Seconds())
+	str += fmt.Sprintf("Latency p50/p99:\t %d/%d us\n", latencies.Percentile(50), latencies.Percentile(99))
 	log.Println(str)
 
+	if *histfile != "" {
+		saveHistogram()
+	}
+}
+
+// Latency histogram with log-linear buckets: values below 2^histSubBits
+// microseconds have their own bucket, every further power of two is split
+// into 2^histSubBits buckets. The relative error is below 1/2^histSubBits.
+const histSubBits = 5
+
+type Histogram struct {
+	counts map[int]uint64
+	count  uint64
+	sum    int64
+	max    int64
+}
+
+func NewHistogram() *Histogram {
+	return &Histogram{counts: make(map[int]uint64)}
+}
+
+func histBucket(us int64) int {
+	if us < 1<<histSubBits {
+		return int(us)
+	}
+	shift := bits.Len64(uint64(us)) - 1 - histSubBits
+	return (shift+1)<<histSubBits + int(us>>shift) - 1<<histSubBits
+}
+
+// Lower bound of a bucket in microseconds.
+func histLow(bucket int) int64 {
+	if bucket < 1<<histSubBits {
+		return int64(bucket)
+	}
+	shift := bucket>>histSubBits - 1
+	return int64(bucket%(1<<histSubBits)+1<<histSubBits) << shift
+}
+
+func (h *Histogram) Record(d time.Duration) {
+	us := d.Microseconds()
+	h.counts[histBucket(us)]++
+	h.count++
+	h.sum += us
+	if us > h.max {
+		h.max = us
+	}
+}
+
+// Percentile returns the lower bound of the bucket containing the p-th
+// percentile in microseconds.
+func (h *Histogram) Percentile(p float64) int64 {
+	if h.count == 0 {
+		return 0
+	}
+	buckets := make([]int, 0, len(h.counts))
+	for b := range h.counts {
+		buckets = append(buckets, b)
+	}
+	sort.Ints(buckets)
+	target := uint64(p / 100 * float64(h.count))
+	var seen uint64
+	for _, b := range buckets {
+		seen += h.counts[b]
+		if seen > target {
+			return histLow(b)
+		}
+	}
+	return histLow(buckets[len(buckets)-1])
+}
+
+// WriteFile stores the non-empty buckets as "<bucket> <count>" lines after
+// a small header. Parsed on the host by util/latency.py.
+func (h *Histogram) WriteFile(path string) error {
+	var buf bytes.Buffer
+	fmt.Fprintf(&buf, "# request latency histogram\n")
+	fmt.Fprintf(&buf, "unit us\nsubbits %d\ncount %d\nsum %d\nmax %d\n",
+		histSubBits, h.count, h.sum, h.max)
+	buckets := make([]int, 0, len(h.counts))
+	for b := range h.counts {
+		buckets = append(buckets, b)
+	}
+	sort.Ints(buckets)
+	for _, b := range buckets {
+		fmt.Fprintf(&buf, "%d %d\n", b, h.counts[b])
+	}
+	return os.WriteFile(path, buf.Bytes(), 0644)
+}
+
+// Write the histogram of the requests measured so far and, with m5ops,
+// copy it to the host. The simulation can stop before the client is done,
+// so this is also done while measuring.
+func saveHistogram() {
+	if err := latencies.WriteFile(*histfile); err != nil {
+		log.Fatalf("client: could not write histogram: %s\n", err)
+	}
+	if *m5_enable {
+		m5op("writefile", *histfile, "latency.hist")
+	}
+}
+
+// Issue a m5 magic instruction through the m5 utility.
+func m5op(args ...string) {
+	cmd := exec.Command("/usr/local/bin/m5", args...)
+	cmd.Run()
 }
 
 type Job struct {
@@ -160,13 +273,22 @@ func httpClient() *http.Client {
 // concurrent instances. These workers will receive
 // work on the `jobs` channel and send the corresponding
 // results on `results`.
-func worker(client *http.Client, jobs []Job, results chan<- int) {
+type Result struct {
+	nbytes  int
+	latency time.Duration
+}
+
+func worker(client *http.Client, jobs []Job, results chan<- Result) {
 	if client == nil {
 		client = httpClient()
 	}
 	for _, j := range jobs {
+		if pacer != nil {
+			<-pacer
+		}
+		start := time.Now()
 		res, _ := invoke(client, j)
-		results <- res
+		results <- Result{res, time.Since(start)}
 	}
 }
 
@@ -176,7 +298,7 @@ func runJobs(client *http.Client, jobs []Job, warming bool) (int, int) {
 	// them work and collect their results. We make 2
 	// channels for this.
 	numJobs := len(jobs)
-	results := make(chan int, numJobs)
+	results := make(chan Result, numJobs)
 
 	// This starts up 3 workers, initially blocked
 	// because there are no jobs yet.
@@ -184,6 +306,24 @@ func runJobs(client *http.Client, jobs []Job, warming bool) (int, int) {
 	if numJobs%*concurrency != 0 {
 		log.Fatalf("Number of jobs (%d) must be a multiple of the concurrency (%d)\n", numJobs, *concurrency)
 	}
+	// In the measurement phase every batch of `m5iv` requests is marked
+	// as a work item so that the simulator can dump stats per batch.
+	roi := !warming && *m5_enable && *m5_interval > 0
+	batch := 0
+
+	// With a fixed request rate the workers are released by a ticker.
+	// Ticks are dropped while all workers are busy, so the rate is an
+	// upper bound once the server is saturated.
+	pacer = nil
+	if !warming && *rate > 0 {
+		ticker := time.NewTicker(time.Second / time.Duration(*rate))
+		defer ticker.Stop()
+		pacer = ticker.C
+	}
+	if roi {
+		m5op("workbegin", strconv.Itoa(batch), "0")
+	}
+
 	for w := 0; w < *concurrency; w++ {
 		wjobs := jobs[w*step : (w+1)*step]
 		go worker(client, wjobs, results)
@@ -197,16 +337,36 @@ func runJobs(client *http.Client, jobs []Job, warming bool) (int, int) {
 	nbytes := 0
 	for a := 1; a <= numJobs; a++ {
 		r := <-results
-		if r > 0 {
+		if r.nbytes > 0 {
 			succesful++
-			nbytes += r
+			nbytes += r.nbytes
+			if !warming {
+				latencies.Record(r.latency)
+			}
 		}
-		if numJobs > 10 && a%(numJobs/10) == 0 {
+		progress := numJobs > 10 && a%(numJobs/10) == 0
+		if progress {
 			log.Printf("Progress: %d/%d\n", a, numJobs)
 		}
-		if !warming && *m5_enable && *m5_interval > 0 && a%*m5_interval == 0 {
+		// The histogram is saved between the batches or, without
+		// batches, after every tenth of the requests.
+		save := !warming && *histfile != "" && a < numJobs
+		if roi && a%*m5_interval == 0 {
+			m5op("workend", strconv.Itoa(batch), "0")
+			batch++
+			if save {
+				saveHistogram()
+			}
+			if a < numJobs {
+				m5op("workbegin", strconv.Itoa(batch), "0")
+			}
+		} else if save && !roi && progress {
+			saveHistogram()
 		}
 	}
+	if roi && numJobs%*m5_interval != 0 {
+		m5op("workend", strconv.Itoa(batch), "0")
+	}
 	return succesful, nbytes
 }
 
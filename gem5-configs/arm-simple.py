@@ -37,11 +37,13 @@ Usage
 ```
 scons build//<ALL|ARM>/gem5.opt -j<NUM_CPUS>
 ./build/<ALL|ARM>/gem5.opt arm-simple.py
-    --mode <setup/eval> --function <function-name>
+    --mode <setup/eval> --workload <function-name>
     --kernel <path-to-vmlinux> --disk <path-to-disk-image>
-    --atomic-warming <num-inv-to-warm> --num-invocations <num-inv-to-simulate>
 ```
 
+Stats per invocation (`--roi`, `--num-invocations`) are only supported by
+`fs-fdp.py`.
+
 """
 import m5
 from m5.objects import (
@@ -28,9 +28,20 @@ The function is invoked using a test client.
 The workflow has two steps
 1. Use the "setup" mode to boot the full system from scratch using the KVM core. The
    script will perform functional warming and then take a checkpoint of the system.
+   Booting Linux is the same for all workloads. Therefore, the first setup takes a
+   checkpoint right after booting and all further setups with the same kernel,
+   disk and system configuration start from there. The "boot" mode only takes
+   this boot checkpoint.
 2. Use the "eval" mode to start from the previously taken checkpoint and perform
    the actual measurements using a detailed core model.
 
+For long running workloads the measurement can be sampled with SimPoints
+1. Use the "profile" mode to collect basic block vectors from the checkpoint
+   with the atomic core and cluster them with `python3 -m util.simpoint cluster`.
+2. Use the "simpoints" mode to take one checkpoint per SimPoint.
+3. Use the "eval" mode with `--simpoint <n>` for every SimPoint and combine
+   the results with `python3 -m util.simpoint combine`.
+
 Usage
 -----
 
@@ -39,10 +50,31 @@ scons build/<ALL|X86|ARM>/gem5.opt -j<NUM_CPUS>
 ./build/<ALL|ARM|gem5.opt fs-fdp.py
     --mode <setup/eval> --workload <benchmark>
     --kernel <path-to-vmlinux> --disk <path-to-disk-image>
-    [--cpu <cpu-type>] [--fdp]
+    [--cpu <cpu-type>] [--fdp] [--simpoint <n>]
+    [--branch-predictor <bp>] [--btb-entries <n>] [--btb-assoc <n>]
+    [--ipf <prefetcher>[:<param>=<value>][+<prefetcher>...]]
+    [--l1i-size <size>] [--l1d-size <size>] [--l2-size <size>]
+    [--l3-size <size> [--l3-assoc <n>] [--l3-latency <cycles>]]
+    [--memory <ddr4|ddr4-single|ddr3|ddr5|lpddr3|lpddr5|simple>]
+    [--num-cores <n> [--server-cores <n>]]
+    [--concurrency <n>] [--invocations <n>] [--warming <n>] [--rate <req/s>]
+    [--latency-hist]
+    [--core-config <core.json>] [--rob-entries <n>] ...
+    [--pack-checkpoints]
+    [--warmup-insts <n> --warmup-cpu <atomic|timing>]
+    [--detailed-warmup-insts <n>]
+    [--fast-forward-insts <n> | --fast-forward-to workbegin[:<n>]]
+    [--max-insts <n>] [--rel-error <e> [--confidence <c>]]
+    [--roi-interval <n>] [--roi [--num-invocations <n>]]
+    [--stats-preset <all|measured|frontend>]
+    [--stats-include <path> ...] [--stats-exclude <path> ...]
+    [--stats-format <text|columnar|hdf5>]
 ```
 
 """
+import atexit
+import json
+import sys
 from pathlib import Path
 from typing import Iterator
 
@@ -50,14 +82,16 @@ import m5
 
 from m5.objects import (
     SimpleBTB,
+    LocalBP,
     LTAGE,
+    TAGE_SC_L_8KB,
     TAGE_SC_L_64KB,
     ITTAGE,
     MultiPrefetcher,
-    TaggedPrefetcher,
-    FetchDirectedPrefetcher,
     L2XBar,
+    CowDiskImage,
 )
+from m5.params import NULL
 from gem5.resources.resource import obtain_resource,KernelResource,DiskImageResource
 from gem5.simulate.exit_event import ExitEvent
 from gem5.simulate.simulator import Simulator
@@ -68,13 +102,30 @@ from gem5.components.cachehierarchies.classic.caches.mmu_cache import MMUCache
 from gem5.components.cachehierarchies.classic.caches.l1dcache import L1DCache
 from gem5.components.cachehierarchies.classic.caches.l2cache import L2Cache
 from gem5.components.cachehierarchies.classic.private_l1_private_l2_cache_hierarchy import PrivateL1PrivateL2CacheHierarchy
-from gem5.components.memory import DualChannelDDR4_2400
+from gem5.components.memory import (
+    DualChannelDDR3_1600,
+    DualChannelDDR4_2400,
+    DualChannelLPDDR3_1600,
+    SingleChannelDDR4_2400,
+)
+from gem5.components.memory.memory import ChanneledMemory
+from gem5.components.memory.dram_interfaces.ddr5 import DDR5_6400_4x8
+from gem5.components.memory.dram_interfaces.lpddr5 import LPDDR5_6400_1x16_BG_BL32
+from gem5.components.memory.simple import SingleChannelSimpleMemory
 from gem5.components.processors.cpu_types import CPUTypes
 from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.components.processors.simple_switchable_processor import SimpleSwitchableProcessor
 
 
 from util.workloads import *
 from util.arguments import *
+from util.simpoint import load_simpoints
+from util.checkpoints import CheckpointCache, fingerprint
+from util.convergence import ConvergenceTracker
+from util.metrics import interval_metrics
+from util.stats import StatsReader, make_filter
+from util.statsdump import StatsDumper
+from util.prefetchers import build_stack, uses_fdp
 
 # This check ensures the gem5 binary is compiled to the correct ISA target.
 # If not, an exception will be thrown.
@@ -84,25 +135,81 @@ arch = isa_to_arch(args.isa)
 
 # Path to the checkpoint directory
 checkpoint_dir = f"wkdir/{arch}/checkpoints"
-if args.mode == "setup":
-    Path("{}/{}".format(checkpoint_dir, args.workload)).mkdir(parents=True, exist_ok=True)
 
 
 
 # Here we setup the processor. For booting we take the KVM core and
-# for the evaluation we can take ATOMIC, TIMING or O3
+# for the evaluation we can take ATOMIC, TIMING or O3. Profiling and
+# taking the SimPoint checkpoints is done with the ATOMIC core.
 
-processor = SimpleProcessor(
-    cpu_type=CPUTypes.KVM if args.mode=="setup" else cpu_types[args.cpu_type],
-    isa=isa_choices[args.isa],
-    num_cores=2,
+if args.mode in ["setup", "boot"]:
+    cpu_type = CPUTypes.KVM
+elif args.mode in ["profile", "simpoints"]:
+    cpu_type = CPUTypes.ATOMIC
+else:
+    cpu_type = cpu_types[args.cpu_type]
+
+# In eval mode the caches can be warmed up with a simple core before
+# switching to the detailed core. The simple core has its own branch
+# predictor, so the predictors, BTB and FTQ of the detailed core are warmed
+# up by a second warmup on the detailed core before the measurement.
+# Alternatively the checkpoint is restored into KVM to fast-forward to the
+# start of the measurement. The warmup then runs on the detailed core.
+warmup = args.mode == "eval" and args.warmup_insts > 0
+detailed_warmup = args.mode == "eval" and args.detailed_warmup_insts > 0
+fast_forward_to = None
+if args.fast_forward_to is not None:
+    marker, _, count = args.fast_forward_to.partition(":")
+    if marker != "workbegin":
+        raise ValueError(f"Unknown fast-forward marker: {marker}")
+    fast_forward_to = int(count or 1)
+fast_forward = args.mode == "eval" and (
+    args.fast_forward_insts > 0 or fast_forward_to is not None
 )
-cpu = processor.cores[-1].core
+if (warmup or detailed_warmup or fast_forward) and args.simpoint is not None:
+    raise ValueError("--warmup-insts, --detailed-warmup-insts and "
+                     "--fast-forward-* can not be combined with --simpoint")
+if detailed_warmup and fast_forward:
+    raise ValueError("With --fast-forward-* the --warmup-insts warmup "
+                     "already runs on the detailed core")
+
+# The server (the container) runs on the last --server-cores cores, the
+# client and the OS on the remaining ones. The last core is the measured one.
+num_server_cores = (args.num_cores - 1 if args.server_cores is None
+                    else args.server_cores)
+if not 1 <= num_server_cores < args.num_cores:
+    raise ValueError("--server-cores must leave at least one core "
+                     "for the client")
+first_server_core = args.num_cores - num_server_cores
+server_cpus = (str(first_server_core) if num_server_cores == 1
+               else f"{first_server_core}-{args.num_cores - 1}")
+client_cpus = ("0" if first_server_core == 1
+               else f"0-{first_server_core - 1}")
+
+if warmup or fast_forward:
+    processor = SimpleSwitchableProcessor(
+        starting_core_type=(CPUTypes.KVM if fast_forward
+                            else cpu_types[args.warmup_cpu]),
+        switch_core_type=cpu_type,
+        isa=isa_choices[args.isa],
+        num_cores=args.num_cores,
+    )
+    # The detailed cores only become active after the switch.
+    server_cores = processor._switchable_cores["switch"][first_server_core:]
+else:
+    processor = SimpleProcessor(
+        cpu_type=cpu_type,
+        isa=isa_choices[args.isa],
+        num_cores=args.num_cores,
+    )
+    server_cores = processor.cores[first_server_core:]
+measured_core = server_cores[-1]
+cpu = measured_core.core
 
 
 class BTB(SimpleBTB):
-    numEntries = 16*1024
-    associativity = 8
+    numEntries = args.btb_entries
+    associativity = args.btb_assoc
 
 
 
@@ -120,40 +227,89 @@ class BPTageSCL(TAGE_SC_L_64KB):
     requiresBTBHit = True
 
 
+class BPTageSCL8KB(TAGE_SC_L_8KB):
+    instShiftAmt = 0
+    btb = BTB()
+    indirectBranchPred=ITTAGE()
+    requiresBTBHit = True
 
 
-if args.mode == "eval":
-    cpu.numROBEntries=576
-    cpu.LQEntries=190
-    cpu.SQEntries=120
-    cpu.numIQEntries=128*2
-    cpu.fetchBufferSize = 32
+# Baseline: a table of 2-bit counters indexed by the branch address.
+# Only the direction predictor differs, BTB and indirect predictor are the
+# same as for the TAGE predictors.
+class BPBimodal(LocalBP):
+    instShiftAmt = 0
+    btb = BTB()
+    indirectBranchPred=ITTAGE()
+    requiresBTBHit = True
+
+
+branch_predictors = {
+    "ltage": BPLTage,
+    "tage-sc-l-8kb": BPTageSCL8KB,
+    "tage-sc-l-64kb": BPTageSCL,
+    "bimodal": BPBimodal,
+}
+
+
+
+def configure_core(cpu):
+    cpu.numROBEntries = args.rob_entries
+    cpu.LQEntries = args.lq_entries
+    cpu.SQEntries = args.sq_entries
+    cpu.numIQEntries = args.iq_entries
+    cpu.fetchBufferSize = args.fetch_buffer_size
 
     # Configure the branch predictor
-    cpu.branchPred = BPTageSCL()
+    cpu.branchPred = branch_predictors[args.branch_predictor]()
 
     if args.fdp:
         # We need to configure the decoupled front-end with some specific parameters.
         # First the fetch buffer and fetch target size. We want double the size of
         # the fetch buffer to be able to run ahead of fetch
-        cpu.fetchTargetWidth = 64
-        cpu.numFTQEntries = 24
+        cpu.fetchTargetWidth = args.fetch_target_width
+        cpu.numFTQEntries = args.ftq_entries
         cpu.minInstSize = 1 if args.isa == "X86" else 4
         cpu.decoupledFrontEnd = True
         # cpu.fetchQueueSize = 16
         cpu.branchPred.takenOnlyHistory=True
 
 
+if args.mode == "eval":
+    for core in server_cores:
+        configure_core(core.core)
+
+
+if args.mode == "profile":
+    # Record a basic block vector of the measured core every interval.
+    # The vectors are written to `simpoint.bb.gz` in the output directory.
+    cpu.addSimPointProbe(args.sp_interval)
+
+
 
 # 2. Instruction prefetcher ---------------------------------------------
 # The decoupled front-end is only the first part.
 # Now we also need the instruction prefetcher which listens to the
 # insertions into the fetch target queue (FTQ) to issue prefetches.
+# By default the FDP prefetcher (with --fdp) is followed by the tagged
+# next-line prefetcher. Other stacks can be given with --ipf.
+
+ipf = args.ipf or ("fdp+tagged" if args.fdp else "tagged")
+if uses_fdp(ipf) and not args.fdp:
+    raise ValueError("The fdp instruction prefetcher requires --fdp")
 
 
+# 3. Cache hierarchy ----------------------------------------------------
+# Private L1I, L1D and L2 per core. With --l3-size the L2s are connected to
+# a shared L3 instead of directly to the memory bus.
+
 class CacheHierarchy(PrivateL1PrivateL2CacheHierarchy):
-    def __init__(self, l1i_size, l1d_size, l2_size):
+    def __init__(self, l1i_size, l1d_size, l2_size, l3_size=None,
+                 l3_assoc=16, l3_latency=20):
         super().__init__(l1i_size, l1d_size, l2_size)
+        self._l3_size = l3_size
+        self._l3_assoc = l3_assoc
+        self._l3_latency = l3_latency
 
     def incorporate_cache(self, board: AbstractBoard) -> None:
         board.connect_system_port(self.membus.cpu_side_ports)
@@ -165,19 +321,16 @@ class CacheHierarchy(PrivateL1PrivateL2CacheHierarchy):
             L1ICache(size=self._l1i_size)
             for i in range(board.get_processor().get_num_cores())
         ]
-        cpu1 = board.get_processor().cores[-1].core
-
-        self.l1icaches[-1].prefetcher = MultiPrefetcher()
-        if args.fdp:
-            self.l1icaches[-1].prefetcher.prefetchers.append(
-                FetchDirectedPrefetcher(use_virtual_addresses=True, cpu=cpu1)
-            )
-        self.l1icaches[-1].prefetcher.prefetchers.append(
-                TaggedPrefetcher(use_virtual_addresses=True)
-            )
-
-        for pf in self.l1icaches[-1].prefetcher.prefetchers:
-            pf.registerMMU(cpu1.mmu)
+        for i, core in enumerate(server_cores, first_server_core):
+            prefetchers = build_stack(ipf, core.core)
+            if prefetchers:
+                self.l1icaches[i].prefetcher = MultiPrefetcher(
+                    prefetchers=prefetchers
+                )
+                for pf in self.l1icaches[i].prefetcher.prefetchers:
+                    pf.registerMMU(core.core.mmu)
+            else:
+                self.l1icaches[i].prefetcher = NULL
 
         self.l1dcaches = [
             L1DCache(size=self._l1d_size)
@@ -199,6 +352,17 @@ class CacheHierarchy(PrivateL1PrivateL2CacheHierarchy):
             L2XBar(width=64) for i in range(board.get_processor().get_num_cores())
         ]
 
+        if self._l3_size:
+            self.l3bus = L2XBar()
+            self.l3cache = L2Cache(
+                size=self._l3_size,
+                assoc=self._l3_assoc,
+                tag_latency=self._l3_latency,
+                data_latency=self._l3_latency,
+                mshrs=64,
+            )
+            self.l3bus.mem_side_ports = self.l3cache.cpu_side
+            self.l3cache.mem_side = self.membus.cpu_side_ports
 
         if board.has_coherent_io():
             self._setup_io_cache(board)
@@ -215,7 +379,10 @@ class CacheHierarchy(PrivateL1PrivateL2CacheHierarchy):
             self.mmubuses[i].mem_side_ports = self.mmucaches[i].cpu_side
             self.l2buses[i].mem_side_ports = self.l2caches[i].cpu_side
 
-            self.membus.cpu_side_ports = self.l2caches[i].mem_side
+            if self._l3_size:
+                self.l2caches[i].mem_side = self.l3bus.cpu_side_ports
+            else:
+                self.membus.cpu_side_ports = self.l2caches[i].mem_side
 
             cpu.connect_walker_ports(
                 self.mmubuses[i].cpu_side_ports, self.mmubuses[i].cpu_side_ports
@@ -230,14 +397,37 @@ class CacheHierarchy(PrivateL1PrivateL2CacheHierarchy):
 
 
 cache_hierarchy = CacheHierarchy(
-    l1i_size="32KiB", l1d_size="32KiB", l2_size="1MB"
+    l1i_size=args.l1i_size,
+    l1d_size=args.l1d_size,
+    l2_size=args.l2_size,
+    l3_size=args.l3_size,
+    l3_assoc=args.l3_assoc,
+    l3_latency=args.l3_latency,
 )
 
 
 
 
-# Memory: Dual Channel DDR4 2400 DRAM device.
-memory = DualChannelDDR4_2400(size="3GiB")
+# Memory: Dual Channel DDR4 2400 DRAM device by default. The simple memory
+# has a fixed latency and bandwidth and no DRAM timing model, which makes
+# it much cheaper to simulate for studies that only look at the frontend.
+memories = {
+    "ddr4": DualChannelDDR4_2400,
+    "ddr4-single": SingleChannelDDR4_2400,
+    "ddr3": DualChannelDDR3_1600,
+    "ddr5": lambda size: ChanneledMemory(DDR5_6400_4x8, 2, 64, size=size),
+    "lpddr3": DualChannelLPDDR3_1600,
+    "lpddr5": lambda size: ChanneledMemory(
+        LPDDR5_6400_1x16_BG_BL32, 4, 64, size=size
+    ),
+    "simple": lambda size: SingleChannelSimpleMemory(
+        latency=args.mem_latency,
+        latency_var="0ns",
+        bandwidth=args.mem_bandwidth,
+        size=size,
+    ),
+}
+memory = memories[args.memory](size=args.mem_size)
 
 
 # Here we setup the board.
@@ -278,30 +468,97 @@ else:
 
 
 
-def workitems(start) -> Iterator[bool]:
-    cnt = 1
+# Only dump the stats of the selected parts of the system. The presets
+# select the server cores (which includes the branch predictor and FTQ
+# stats) with their caches. The caches are only created when the board is
+# instantiated, so they are looked up at the first dump. gem5 picks their
+# names (zero padded with more than 10 cores).
+stats_include = list(args.stats_include)
+server_ids = range(first_server_core, args.num_cores)
+if args.stats_preset in ["measured", "frontend"]:
+    stats_include += server_cores
+    stats_include += [lambda i=i: cache_hierarchy.l1icaches[i]
+                      for i in server_ids]
+if args.stats_preset == "measured":
+    stats_include += [lambda i=i: cache_hierarchy.l1dcaches[i]
+                      for i in server_ids]
+    stats_include += [lambda i=i: cache_hierarchy.l2caches[i]
+                      for i in server_ids]
+    if args.l3_size:
+        stats_include += [lambda: cache_hierarchy.l3cache]
+stats_dumper = StatsDumper(stats_include, args.stats_exclude,
+                           args.stats_format, args.keep_stats_txt)
+
+
+# Per invocation region of interest. The http client marks every batch of
+# requests with workbegin/workend. Stats are dumped at both markers so the
+# requests ("roi") and everything in between ("gap") end up in separate
+# dumps. roi.csv records which dump is which.
+roi = args.mode == "eval" and args.roi
+if roi:
+    if args.simpoint is not None or args.rel_error is not None:
+        raise ValueError("--roi can not be combined with --simpoint or --rel-error")
+    board.exit_on_work_items = True
+    roi_file = Path(m5.options.outdir) / "roi.csv"
+    roi_file.write_text("dump,kind,invocation\n")
+if fast_forward_to is not None:
+    board.exit_on_work_items = True
+roi_dumps = []
+# Stats are measured once fast-forward and warmup are over. Only batches of
+# requests that began after that are dumped as "roi", a batch that was
+# running when the measurement started is incomplete.
+measuring = not (fast_forward or warmup or detailed_warmup)
+in_batch = False
+
+
+def dumpRoi(kind: str, invocation: int) -> None:
+    stats_dumper.dump()
+    m5.stats.reset()
+    with open(roi_file, "a") as f:
+        f.write(f"{len(roi_dumps)},{kind},{invocation}\n")
+    roi_dumps.append(kind)
+
+
+def workBegin() -> Iterator[bool]:
+    global in_batch
+    cnt = 0
     while True:
-        if start:
-            print("Begin Invocation ", cnt)
-        else:
-            print("End Invocation ", cnt)
-            if args.mode == "eval":
-                m5.stats.dump()
-                m5.stats.reset()
+        cnt += 1
+        print("Begin Invocation ", cnt)
+        if fast_forward_to is not None and not switched:
+            if cnt >= fast_forward_to:
+                fastForwardDone()
+                # Without warmup the measurement starts with this batch.
+                in_batch = roi and measuring
+        elif roi and measuring:
+            dumpRoi("gap", cnt)
+            in_batch = True
+        yield False
 
-            cnt += 1
 
-        if args.mode == "eval" and cnt >= args.num_invocations:
-            yield True
-        yield False
+def workEnd() -> Iterator[bool]:
+    global in_batch
+    cnt = 0
+    while True:
+        cnt += 1
+        print("End Invocation ", cnt)
+        # No dumps while fast-forwarding in KVM or warming up.
+        if roi and in_batch:
+            dumpRoi("roi", cnt)
+            in_batch = False
+        yield (roi and args.num_invocations is not None
+               and roi_dumps.count("roi") >= args.num_invocations)
 
 
 def executeExit() -> Iterator[bool]:
 
-    if args.mode == "setup":
+    if args.mode in ["setup", "boot"]:
 
-        print("1: BOOTING complete")
-        yield False
+        if not restore_boot:
+            print("1: BOOTING complete")
+            if checkpoints.lookup("boot", boot_inputs) is None:
+                takeBootCheckpoint()
+            yield args.mode == "boot"
 
         print("2: Started container")
         yield False
@@ -314,11 +571,26 @@ def executeExit() -> Iterator[bool]:
 
     else:
         print("Simulation done")
-        m5.stats.dump()
+        if roi:
+            dumpRoi("gap", len(roi_dumps) // 2 + 1)
+        else:
+            stats_dumper.dump()
         m5.exit()
 
 
 
+def takeBootCheckpoint() -> None:
+    # Several setups may boot at the same time. Each writes to its own
+    # directory and only the first one is kept.
+    staging = checkpoints.staging("boot", boot_inputs)
+    m5.checkpoint(str(staging))
+    if checkpoints.publish(staging, "boot", boot_inputs):
+        print("Boot checkpoint: ", boot_checkpoint)
+        if args.pack_checkpoints:
+            checkpoints.pack(boot_checkpoint)
+
+
+
 def executeFail() -> Iterator[bool]:
 
     while True:
@@ -326,8 +598,11 @@ def executeFail() -> Iterator[bool]:
         print("Fail code: ", fc)
         if fc == 4:
             if args.mode == "setup":
-                m5.checkpoint("{}/{}".format(checkpoint_dir, args.workload))
-                m5.stats.dump()
+                m5.checkpoint(workload_checkpoint)
+                checkpoints.commit(workload_checkpoint, checkpoint_inputs)
+                if args.pack_checkpoints:
+                    checkpoints.pack(workload_checkpoint)
+                stats_dumper.dump()
                 m5.stats.reset()
 
         yield False
@@ -336,27 +611,141 @@ def executeFail() -> Iterator[bool]:
 
 delta = 50_000_000
 
+# With a relative error given, the metrics of every interval are read back
+# from the stats file and the run stops once their means are known
+# precisely enough.
+tracker = None
+if args.rel_error is not None:
+    tracker = ConvergenceTracker(
+        args.converge_metrics, args.rel_error,
+        confidence=args.confidence, min_intervals=args.min_intervals,
+    )
+    interval_stats = StatsReader(
+        Path(m5.options.outdir) / m5.options.stats_file,
+        keep=make_filter(["board.processor.", "board.cache_hierarchy.l1icaches"]),
+    )
+
 def maxInsts() -> Iterator[bool]:
     sim_instr = 0
-    max_instr = 1_000_000_000
+    max_instr = args.max_insts
 
     while True:
-        m5.stats.dump()
+        stats_dumper.dump()
         m5.stats.reset()
         sim_instr += delta
         print("Simulated Instructions: ", sim_instr)
         # simulator.schedule_max_insts(delta)
-        processor.cores[-1]._set_inst_stop_any_thread(delta, True)
+        processor.get_cores()[-1]._set_inst_stop_any_thread(delta, True)
+
+        if tracker is not None:
+            for block in interval_stats.poll():
+                tracker.add(interval_metrics(block))
+            print("Convergence: ", tracker.summary())
+            if tracker.converged():
+                print("Metrics converged after ", sim_instr, " instructions")
+                yield True
+
         if sim_instr >= max_instr:
             yield True
         yield False
 
 
+switched = False
+
+
+def switchCores() -> None:
+    global switched
+    if not switched:
+        processor.switch()
+        switched = True
+
+
+def startMeasurement() -> None:
+    global measuring
+    measuring = True
+    m5.stats.reset()
+    # In ROI mode stats are dumped by the work items. Instructions only
+    # limit the length of the run.
+    processor.get_cores()[-1]._set_inst_stop_any_thread(
+        args.max_insts if roi else delta, True
+    )
+
+
+def detailedWarmup(insts: int) -> None:
+    # Warm up the caches and predictors of the detailed core before
+    # measuring.
+    m5.stats.reset()
+    processor.get_cores()[-1]._set_inst_stop_any_thread(insts, True)
+
+
+def fastForwardDone() -> None:
+    print("Fast-forward done")
+    switchCores()
+    if fast_forward and warmup:
+        detailedWarmup(args.warmup_insts)
+    else:
+        startMeasurement()
+
+
+def evalInsts() -> Iterator[bool]:
+    # The phases before the measurement that end after a number of
+    # instructions: fast-forward with KVM, warmup and detailed warmup.
+    if args.fast_forward_insts > 0:
+        fastForwardDone()
+        yield False
+    if warmup:
+        print("Warmup done: ", args.warmup_insts)
+        switchCores()
+        if detailed_warmup:
+            detailedWarmup(args.detailed_warmup_insts)
+            yield False
+    if detailed_warmup:
+        print("Detailed warmup done: ", args.detailed_warmup_insts)
+    if warmup or detailed_warmup:
+        startMeasurement()
+        yield False
+
+    if roi:
+        print("Instruction limit reached: ", args.max_insts)
+        yield True
+    else:
+        yield from maxInsts()
+
+
+def profileInsts() -> Iterator[bool]:
+    print("Profiled Instructions: ", args.sp_max_insts)
+    yield True
+
+
+def simpointInsts() -> Iterator[bool]:
+    if simpoint.warmup > 0:
+        print("Warmup done: ", simpoint.warmup)
+        m5.stats.reset()
+        processor.get_cores()[-1]._set_inst_stop_any_thread(args.sp_interval, True)
+        yield False
+
+    print("SimPoint done: ", simpoint.index)
+    stats_dumper.dump()
+    yield True
+
+
+def takeSimpoints() -> Iterator[bool]:
+    for sp in pending_simpoints:
+        print("Take checkpoint of SimPoint ", sp.index, " at ", sp.start)
+        m5.checkpoint(simpoint_checkpoint(sp))
+        yield sp is pending_simpoints[-1]
+    yield True
+
+
 kernel_args = [
-    'isolcpus=1',
     'cloud-init=disabled',
     'mitigations=off',
 ]
+# A single server core is isolated from the scheduler. isolcpus also turns
+# off load balancing between the isolated cores, so with several server
+# cores they stay in the scheduler and the client is pinned to its cores.
+if num_server_cores == 1:
+    kernel_args = [f'isolcpus={server_cpus}'] + kernel_args
 if args.isa == "Arm":
     kernel_args += [
         "console=ttyAMA0",
@@ -370,36 +759,212 @@ elif args.isa == "X86":
         "root=/dev/sda2",
     ]
 
+runscript_cfg = {"m5iv": args.roi_interval}
+# Load level of the http workloads. Not given values keep the
+# defaults of the workload.
+for key in ["concurrency", "invocations", "warming", "rate"]:
+    if getattr(args, key) is not None:
+        runscript_cfg[key] = getattr(args, key)
+if args.latency_hist:
+    runscript_cfg["latency_hist"] = True
+if num_server_cores > 1:
+    runscript_cfg["client_cpus"] = client_cpus
+runscript = wlcfg[args.workload]["runscript"](
+    wlcfg[args.workload] | runscript_cfg, server_cpus
+)
+
+
+# Checkpoints are identified by everything that went into taking them.
+# Setup is skipped if a matching checkpoint exists and evaluation only
+# starts from a checkpoint that matches the current inputs.
+checkpoints = CheckpointCache(checkpoint_dir)
+checkpoint_inputs = {
+    "workload": args.workload,
+    "isa": args.isa,
+    "kernel": fingerprint(args.kernel),
+    "disk": fingerprint(args.disk),
+    "bootloader": "arm64-bootloader" if args.isa == "Arm" else None,
+    "runscript": runscript,
+    "num_cores": processor.get_num_cores(),
+    "memory": memory.get_size(),
+    "kernel_args": kernel_args,
+}
+workload_checkpoint = str(checkpoints.path(args.workload, checkpoint_inputs))
+print("Checkpoint: ", workload_checkpoint)
+
+# The boot checkpoint is taken before the run script is read and
+# can therefore be shared by all workloads.
+boot_inputs = {
+    k: v for k, v in checkpoint_inputs.items()
+    if k not in ["workload", "runscript"]
+}
+boot_checkpoint = str(checkpoints.path("boot", boot_inputs))
+restore_boot = (
+    args.mode == "setup"
+    and not args.no_boot_checkpoint
+    and checkpoints.lookup("boot", boot_inputs) is not None
+)
+
+if args.mode == "boot":
+    if checkpoints.lookup("boot", boot_inputs):
+        print("Boot checkpoint is up to date, nothing to do.")
+        sys.exit(0)
+elif args.mode == "setup":
+    if not args.force_setup and checkpoints.lookup(args.workload, checkpoint_inputs):
+        print("Checkpoint is up to date, nothing to do.")
+        sys.exit(0)
+    Path(workload_checkpoint).mkdir(parents=True, exist_ok=True)
+elif checkpoints.lookup(args.workload, checkpoint_inputs) is None:
+    raise FileNotFoundError(
+        "No checkpoint for the current configuration. Run the setup mode "
+        "first. " + checkpoints.explain_miss(args.workload, checkpoint_inputs)
+    )
+
+
+# SimPoints are found by clustering the profile of the workload. The
+# `simpoints` and `weights` files are placed next to the checkpoint.
+simpoint_dir = workload_checkpoint + "-simpoints"
+simpoints = []
+simpoint = None
+if args.mode == "profile":
+    print("SimPoint directory: ", simpoint_dir)
+if args.mode == "simpoints" or args.simpoint is not None:
+    simpoints = load_simpoints(simpoint_dir, args.sp_interval, args.sp_warmup)
+if args.mode == "eval" and args.simpoint is not None:
+    simpoint = simpoints[args.simpoint]
+
+# SimPoints that start with the region of interest already have a checkpoint.
+pending_simpoints = sorted(
+    [sp for sp in simpoints if sp.start > 0], key=lambda sp: sp.start
+)
+
+
+def simpoint_checkpoint(sp) -> str:
+    # A SimPoint at the very beginning of the region of interest
+    # starts right from the workload checkpoint.
+    if sp.start == 0:
+        return workload_checkpoint
+    return "{}/cpt.{}".format(simpoint_dir, sp.index)
+
+
+restore_checkpoint = (
+    Path(boot_checkpoint) if restore_boot
+    else None if args.mode in ["setup", "boot"]
+    else Path(simpoint_checkpoint(simpoint)) if simpoint is not None
+    else Path(workload_checkpoint)
+)
+# Every run restores from its own view of the checkpoint in the output
+# directory. The setup checkpoints are taken with a SimpleProcessor whose
+# cores are named `cores<n>`. The switchable processor starts with the
+# `start<n>` cores, so its view has the CPU sections renamed. Otherwise gem5
+# skips them and the cores start without the checkpointed CPU and thread
+# context state.
+rebuilt = []
+if restore_checkpoint is not None:
+    view = checkpoints.restore_view(
+        restore_checkpoint, Path(m5.options.outdir) / "checkpoint",
+        {"board.processor.cores": "board.processor.start"}
+        if warmup or fast_forward else None,
+    )
+    # Rebuild the memory image of a packed checkpoint into the view. It
+    # is removed again once gem5 has loaded it.
+    rebuilt = checkpoints.materialize(restore_checkpoint, view)
+    if rebuilt:
+        print("Rebuilt packed checkpoint: ", restore_checkpoint)
+    restore_checkpoint = view
+
 # Here we set a full system workload.
 board.set_kernel_disk_workload(
     kernel=KernelResource(args.kernel),
     disk_image=DiskImageResource(args.disk),
     bootloader=obtain_resource("arm64-bootloader") if args.isa == "Arm" else None,
-    readfile_contents=wlcfg[args.workload]["runscript"](wlcfg[args.workload], 1),
+    readfile_contents=runscript,
     kernel_args=kernel_args,
-    checkpoint=Path("{}/{}".format(checkpoint_dir, args.workload)) if args.mode=="eval" else None,
+    checkpoint=restore_checkpoint,
 )
 
+# The boards put the disk image behind a copy-on-write layer which keeps all
+# writes of the guest in memory (and in the checkpoints). Make sure the
+# image itself is only opened read-only, so any number of parallel runs can
+# share one disk.img and no run can modify it.
+disk_overlays = [obj for obj in board.descendants()
+                 if isinstance(obj, CowDiskImage)]
+if not disk_overlays:
+    raise RuntimeError("The board does not use a copy-on-write disk image")
+for overlay in disk_overlays:
+    overlay.child.read_only = True
+
 class MySimulator(Simulator):
+    def _instantiate(self):
+        super()._instantiate()
+        # Memory is loaded from the checkpoint, the rebuilt files are no
+        # longer needed.
+        for path in rebuilt:
+            path.unlink(missing_ok=True)
+        rebuilt.clear()
+
     def get_last_exit_event_code(self):
         return self._last_exit_event.getCode()
 
 
+def writeExitCause() -> None:
+    # Recorded by scripts/sweep.py in the job status.
+    if simulator._last_exit_event is None:
+        return
+    with open(Path(m5.options.outdir) / "exit.json", "w") as f:
+        json.dump({
+            "cause": simulator.get_last_exit_event_cause(),
+            "code": simulator.get_last_exit_event_code(),
+            "tick": m5.curTick(),
+        }, f)
+
+
 # We define the system with the aforementioned system defined.
 simulator = MySimulator(
     board=board,
     on_exit_event={
         ExitEvent.EXIT: executeExit(),
         ExitEvent.FAIL: executeFail(),
-        ExitEvent.MAX_INSTS: maxInsts(),
+        ExitEvent.MAX_INSTS: profileInsts() if args.mode == "profile"
+            else simpointInsts() if simpoint is not None
+            else evalInsts(),
+        ExitEvent.SIMPOINT_BEGIN: takeSimpoints(),
+        ExitEvent.WORKBEGIN: workBegin(),
+        ExitEvent.WORKEND: workEnd(),
     },
 )
+atexit.register(writeExitCause)
 
 
 
-if args.mode == "eval":
+if args.mode == "eval" and simpoint is not None:
+    processor.get_cores()[-1]._set_inst_stop_any_thread(
+        simpoint.warmup if simpoint.warmup > 0 else args.sp_interval, False
+    )
+elif args.mode == "eval":
     # simulator.schedule_max_insts(delta)
-    processor.cores[-1]._set_inst_stop_any_thread(delta, False)
+    if args.fast_forward_insts > 0:
+        first_stop = args.fast_forward_insts
+    elif fast_forward_to is not None:
+        # Runs in KVM until the marker.
+        first_stop = None
+    elif warmup:
+        first_stop = args.warmup_insts
+    elif detailed_warmup:
+        first_stop = args.detailed_warmup_insts
+    else:
+        first_stop = args.max_insts if roi else delta
+    if first_stop is not None:
+        processor.get_cores()[-1]._set_inst_stop_any_thread(first_stop, False)
+elif args.mode == "profile":
+    processor.get_cores()[-1]._set_inst_stop_any_thread(args.sp_max_insts, False)
+elif args.mode == "simpoints":
+    if not pending_simpoints:
+        print("All SimPoints start at the workload checkpoint.")
+        sys.exit(0)
+    processor.get_cores()[-1]._set_simpoint(
+        [sp.start for sp in pending_simpoints], False
+    )
 
 
 
@@ -25,6 +25,7 @@ from gem5.isas import ISA
 
 from .workloads import *
 import argparse
+import json
 
 
 parser = argparse.ArgumentParser(
@@ -58,11 +59,71 @@ parser.add_argument(
     "--mode",
     type=str,
     default="setup",
-    choices=["setup", "eval",],
+    choices=["setup", "eval", "profile", "simpoints", "boot",],
     help="""Setup mode: Will boot linux using the kvm core, perform functional
-            warming and then take a snapshot.
+            warming and then take a snapshot. If a boot checkpoint exists
+            the setup starts from there instead of booting.
             Evaluation mode: Will start from a previously taken checkpoint and
-            run the actual measurements using the specified core.""",
+            run the actual measurements using the specified core.
+            Profile mode: Will start from the checkpoint and collect basic
+            block vectors with the atomic core for SimPoint clustering.
+            SimPoints mode: Will start from the checkpoint and take one
+            checkpoint per SimPoint found by the clustering.
+            Boot mode: Will boot linux using the kvm core and only take the
+            boot checkpoint shared by the setup of all workloads.""",
+)
+
+parser.add_argument(
+    "--simpoint",
+    type=int,
+    default=None,
+    help="""Evaluation mode: Start from the checkpoint of the given SimPoint,
+            warm up and only simulate its interval.""",
+)
+
+parser.add_argument(
+    "--sp-interval",
+    type=int,
+    default=10_000_000,
+    help="Number of instructions per SimPoint interval.",
+)
+
+parser.add_argument(
+    "--sp-warmup",
+    type=int,
+    default=1_000_000,
+    help="""Number of instructions simulated before a SimPoint interval
+            to warm up the microarchitectural state.""",
+)
+
+parser.add_argument(
+    "--sp-max-insts",
+    type=int,
+    default=10_000_000_000,
+    help="Number of instructions to profile in profile mode.",
+)
+
+parser.add_argument(
+    "--force-setup",
+    action="store_true",
+    default=False,
+    help="""Setup mode: Take the checkpoint even if a checkpoint with the
+            same kernel, disk, run script and configuration already exists.""",
+)
+
+parser.add_argument(
+    "--no-boot-checkpoint",
+    action="store_true",
+    default=False,
+    help="Setup mode: Boot from scratch instead of using the boot checkpoint.",
+)
+
+parser.add_argument(
+    "--pack-checkpoints",
+    action="store_true",
+    default=False,
+    help="""Setup mode: Move the memory images of the new checkpoints into
+            the deduplicated chunk store. They are rebuilt when restored.""",
 )
 
 cpu_types = {
@@ -79,6 +140,170 @@ parser.add_argument(
     choices=cpu_types.keys(),
 )
 
+parser.add_argument(
+    "--warmup-insts",
+    type=int,
+    default=0,
+    help="""Evaluation mode: Number of instructions to warm up the caches
+            with the warmup CPU before switching to the CPU given by
+            --cpu-type and resetting the stats. The warmup CPU has its own
+            branch predictor, use --detailed-warmup-insts to warm up the
+            one of the detailed CPU.""",
+)
+
+parser.add_argument(
+    "--detailed-warmup-insts",
+    type=int,
+    default=0,
+    help="""Evaluation mode: Number of instructions to warm up the caches,
+            branch predictors, BTB and FTQ on the CPU given by --cpu-type
+            before resetting the stats and measuring. Runs after the
+            --warmup-insts warmup.""",
+)
+
+parser.add_argument(
+    "--warmup-cpu",
+    type=str,
+    default="atomic",
+    help="The CPU model used for the warmup.",
+    choices=["atomic", "timing"],
+)
+
+_fast_forward = parser.add_mutually_exclusive_group()
+
+_fast_forward.add_argument(
+    "--fast-forward-insts",
+    type=int,
+    default=0,
+    help="""Evaluation mode: Restore the checkpoint into KVM and execute
+            this many instructions before switching to the CPU given by
+            --cpu-type. Moves the measurement window without taking a new
+            checkpoint. With --warmup-insts the warmup runs on the detailed
+            CPU after the switch.""",
+)
+
+_fast_forward.add_argument(
+    "--fast-forward-to",
+    type=str,
+    default=None,
+    help="""Evaluation mode: Like --fast-forward-insts but run in KVM until
+            the n-th work item of the client begins ('workbegin:<n>',
+            default n=1). Requires a checkpoint taken with --roi-interval.""",
+)
+
+parser.add_argument(
+    "--max-insts",
+    type=int,
+    default=1_000_000_000,
+    help="Evaluation mode: Maximum number of instructions to simulate.",
+)
+
+parser.add_argument(
+    "--rel-error",
+    type=float,
+    default=None,
+    help="""Evaluation mode: Stop as soon as the confidence interval of the
+            mean of every convergence metric is within this relative error
+            (e.g. 0.01). By default the run always simulates --max-insts.""",
+)
+
+parser.add_argument(
+    "--confidence",
+    type=float,
+    default=0.95,
+    help="Confidence level of the convergence check.",
+)
+
+parser.add_argument(
+    "--converge-metrics",
+    type=str,
+    nargs="+",
+    default=["ipc"],
+    choices=["ipc", "l1i_mpki", "branch_mpki"],
+    help="Interval metrics that need to converge.",
+)
+
+parser.add_argument(
+    "--min-intervals",
+    type=int,
+    default=5,
+    help="Minimum number of intervals before the run may stop early.",
+)
+
+parser.add_argument(
+    "--roi-interval",
+    type=int,
+    default=0,
+    help="""Number of requests the http client sends per work item. With a
+            value > 0 the client marks each batch with m5 workbegin/workend.
+            Needs to be given already in setup mode as the client is started
+            before the checkpoint.""",
+)
+
+parser.add_argument(
+    "--roi",
+    action="store_true",
+    default=False,
+    help="""Evaluation mode: Dump the stats at every workbegin/workend
+            instead of every fixed number of instructions. Requests and the
+            time in between are measured separately, see roi.csv.""",
+)
+
+parser.add_argument(
+    "--num-invocations",
+    type=int,
+    default=None,
+    help="""Evaluation mode with --roi: Stop after this many work items.
+            By default the simulation runs until the client is done.""",
+)
+
+parser.add_argument(
+    "--stats-preset",
+    type=str,
+    default="all",
+    choices=["all", "measured", "frontend"],
+    help="""Stats written at every dump. all: the whole system, measured:
+            the measured core with its L1 and L2 caches, frontend: the
+            measured core with its L1 instruction cache.""",
+)
+
+parser.add_argument(
+    "--stats-include",
+    type=str,
+    nargs="+",
+    default=[],
+    help="""Additionally dump the stats of these SimObjects
+            (e.g. board.cache_hierarchy.l2caches1).""",
+)
+
+parser.add_argument(
+    "--stats-exclude",
+    type=str,
+    nargs="+",
+    default=[],
+    help="""Do not dump the stats of these SimObjects
+            (e.g. board.memory).""",
+)
+
+parser.add_argument(
+    "--stats-format",
+    type=str,
+    default="text",
+    choices=["text", "columnar", "hdf5"],
+    help="""Format of the interval stats. text: stats.txt, columnar: a
+            compressed columnar stats.cols, hdf5: gem5's stats.h5 (needs
+            gem5 built with HDF5). Read any of them with
+            util.stats.load_stats().""",
+)
+
+parser.add_argument(
+    "--keep-stats-txt",
+    action="store_true",
+    default=False,
+    help="""With --stats-format columnar or hdf5: Keep stats.txt
+            instead of removing it at exit.""",
+)
+
 parser.add_argument(
     "--fdp",
     action="store_true",
@@ -86,6 +311,191 @@ parser.add_argument(
     help="Enable FDP",
 )
 
+parser.add_argument(
+    "--branch-predictor",
+    type=str,
+    default="tage-sc-l-64kb",
+    choices=["ltage", "tage-sc-l-8kb", "tage-sc-l-64kb", "bimodal"],
+    help="""Conditional branch predictor of the O3 core. All predictors
+            use the BTB given by --btb-entries/--btb-assoc and ITTAGE for
+            indirect branches.""",
+)
+
+parser.add_argument(
+    "--ipf",
+    type=str,
+    default=None,
+    help="""L1I prefetchers of the measured core in the order they are
+            asked for prefetches, separated by '+', each optionally with
+            parameters, e.g. 'fdp+tagged:degree=4'. Known names: none,
+            fdp, tagged, nextline, pif or any gem5 prefetcher class.
+            Default: 'fdp+tagged' with --fdp, else 'tagged'.""",
+)
+
+parser.add_argument(
+    "--l1i-size",
+    type=str,
+    default="32KiB",
+    help="Size of the private L1 instruction caches.",
+)
+
+parser.add_argument(
+    "--l1d-size",
+    type=str,
+    default="32KiB",
+    help="Size of the private L1 data caches.",
+)
+
+parser.add_argument(
+    "--l2-size",
+    type=str,
+    default="1MB",
+    help="Size of the private L2 caches.",
+)
+
+parser.add_argument(
+    "--l3-size",
+    type=str,
+    default=None,
+    help="""Size of a shared L3 cache between the L2 caches and memory.
+            No L3 if not given.""",
+)
+
+parser.add_argument(
+    "--l3-assoc",
+    type=int,
+    default=16,
+    help="Associativity of the shared L3 cache.",
+)
+
+parser.add_argument(
+    "--l3-latency",
+    type=int,
+    default=20,
+    help="Tag and data access latency of the shared L3 cache in cycles.",
+)
+
+parser.add_argument(
+    "--memory",
+    type=str,
+    default="ddr4",
+    choices=["ddr4", "ddr4-single", "ddr3", "ddr5", "lpddr3", "lpddr5",
+             "simple"],
+    help="""Memory model. ddr4: dual channel DDR4-2400, ddr4-single: single
+            channel DDR4-2400, ddr3: dual channel DDR3-1600, ddr5: dual
+            channel DDR5-6400, lpddr3: dual channel LPDDR3-1600, lpddr5:
+            quad channel LPDDR5-6400, simple: fixed latency memory without
+            DRAM timing (see --mem-latency and --mem-bandwidth).""",
+)
+
+parser.add_argument(
+    "--mem-size",
+    type=str,
+    default="3GiB",
+    help="""Size of the simulated memory. Checkpoints are only shared
+            between runs with the same size.""",
+)
+
+parser.add_argument(
+    "--mem-latency",
+    type=str,
+    default="50ns",
+    help="Access latency of the simple memory.",
+)
+
+parser.add_argument(
+    "--mem-bandwidth",
+    type=str,
+    default="32GiB/s",
+    help="Bandwidth of the simple memory.",
+)
+
+parser.add_argument(
+    "--num-cores",
+    type=int,
+    default=2,
+    help="""Number of simulated cores. Every core has its own L1 and L2
+            caches.""",
+)
+
+parser.add_argument(
+    "--server-cores",
+    type=int,
+    default=None,
+    help="""Number of cores the workload container is pinned to (the last
+            ones). The client runs on the remaining cores.
+            Default: all but the first core.""",
+)
+
+parser.add_argument(
+    "--concurrency",
+    type=int,
+    default=None,
+    help="""HTTP workloads: Number of concurrent client connections
+            (default 2). Part of the checkpoint.""",
+)
+
+parser.add_argument(
+    "--invocations",
+    type=int,
+    default=None,
+    help="""HTTP workloads: Number of measured requests (default 200).
+            Part of the checkpoint.""",
+)
+
+parser.add_argument(
+    "--warming",
+    type=int,
+    default=None,
+    help="""HTTP workloads: Number of warmup requests sent before the
+            checkpoint (default 5000). Part of the checkpoint.""",
+)
+
+parser.add_argument(
+    "--rate",
+    type=int,
+    default=None,
+    help="""HTTP workloads: Send the measured requests at this fixed rate
+            (requests per simulated second) instead of back to back.
+            Part of the checkpoint.""",
+)
+
+parser.add_argument(
+    "--latency-hist",
+    action="store_true",
+    default=False,
+    help="""HTTP workloads: The client records a histogram of the request
+            latencies, which it copies to latency.hist in the output
+            directory while measuring. Part of the
+            checkpoint.""",
+)
+
+# Microarchitecture of the O3 core in eval mode. The values can also be given
+# in a JSON file with --core-config, e.g. {"rob-entries": 384}. Options given
+# on the command line take precedence over the file.
+core_params = {
+    "rob-entries": (576, "Number of reorder buffer entries."),
+    "lq-entries": (190, "Number of load queue entries."),
+    "sq-entries": (120, "Number of store queue entries."),
+    "iq-entries": (256, "Number of instruction queue entries."),
+    "fetch-buffer-size": (32, "Size of the fetch buffer in bytes."),
+    "fetch-target-width": (64, "FDP: Maximum size of a fetch target in bytes."),
+    "ftq-entries": (24, "FDP: Number of fetch target queue entries."),
+    "btb-entries": (16 * 1024, "Number of BTB entries."),
+    "btb-assoc": (8, "Associativity of the BTB."),
+}
+
+for name, (default, text) in core_params.items():
+    parser.add_argument(f"--{name}", type=int, default=default, help=text)
+
+parser.add_argument(
+    "--core-config",
+    type=str,
+    default=None,
+    help="""JSON file with core parameters (e.g. {"rob-entries": 384}).
+            Options given on the command line override the file.""",
+)
+
 isa_choices = {
     "X86": ISA.X86,
     "Arm": ISA.ARM,
@@ -100,6 +510,22 @@ parser.add_argument(
     choices=isa_choices.keys(),
 )
 
+
+def load_core_config(path: str) -> dict:
+    """Read a core config file and return it as parser defaults."""
+    with open(path) as f:
+        config = json.load(f)
+    unknown = set(config) - set(core_params)
+    if unknown:
+        raise ValueError(f"Unknown core parameters in {path}: "
+                         f"{', '.join(sorted(unknown))}")
+    return {name.replace("-", "_"): int(v) for name, v in config.items()}
+
+
+_known, _ = parser.parse_known_args()
+if _known.core_config:
+    parser.set_defaults(**load_core_config(_known.core_config))
+
 args = parser.parse_args()
 
 
@@ -0,0 +1,416 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Content addressed checkpoint cache.
+
+A checkpoint is stored under `<checkpoint_dir>/<name>-<key>` where the key is
+a hash over everything that went into producing it: ISA, kernel, disk image,
+run script, number of cores, memory size and kernel arguments. After the
+checkpoint is written a `manifest.json` with all the inputs is placed next to
+it, so an interrupted setup never leaves a checkpoint that looks valid.
+
+Kernel and disk images are identified by the hash of their whole content.
+The hash is cached next to the file and only recomputed after the file
+changed, see `fingerprint()`.
+
+Checkpoints can be packed into a chunk store shared by all checkpoints of the
+directory (`<checkpoint_dir>/chunks`). Memory images and other large files
+are split into `CHUNK_SIZE` chunks which are stored zlib compressed under
+their hash, so pages that are identical across checkpoints (kernel, base
+image, zero pages) are only stored once. The file is replaced by a
+`<file>.chunks` index. `gc()` removes the chunks no index refers to, it waits
+for running packs. Before a packed checkpoint is restored the files are
+rebuilt with `materialize()`, by default into a private view of the
+checkpoint for the run (`restore_view()`) that can be removed once gem5 has
+loaded it: the chunks are written into a sparse, memory-mapped file, zero
+chunks are left as holes. Memory images are rebuilt uncompressed, which gem5
+reads as well as its gzip compressed ones.
+
+Usage
+-----
+
+```
+python3 -m util.checkpoints wkdir/<arch>/checkpoints
+python3 -m util.checkpoints wkdir/<arch>/checkpoints --pack
+python3 -m util.checkpoints wkdir/<arch>/checkpoints --unpack
+python3 -m util.checkpoints wkdir/<arch>/checkpoints --gc
+```
+
+"""
+import argparse
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+MANIFEST = "manifest.json"
+CHUNK_DIR = "chunks"
+CHUNK_INDEX = ".chunks"
+LOCK = ".lock"
+
+# Packing granularity: 16 pages of 4KiB.
+CHUNK_SIZE = 64 << 10
+# Smaller files (m5.cpt, the manifest) stay in the checkpoint directory.
+PACK_MIN_SIZE = 1 << 20
+
+# Cached fingerprint of a file, stored as `<file>.fingerprint`.
+FINGERPRINT = ".fingerprint"
+HASH_BLOCK = 1 << 20
+
+
+def fingerprint(path) -> str:
+    """Identify a file by the hash of its content. Hashing a multi GB disk
+    image takes a while, so the hash is cached in `<file>.fingerprint`
+    together with the path, inode, size and modification time of the file
+    and only recomputed once one of them changed."""
+    path = Path(path).resolve()
+    st = path.stat()
+    stamp = {"path": str(path), "ino": st.st_ino, "size": st.st_size,
+             "mtime_ns": st.st_mtime_ns}
+    cache = path.with_name(path.name + FINGERPRINT)
+    try:
+        with open(cache) as f:
+            cached = json.load(f)
+        if cached["stamp"] == stamp:
+            return cached["sha256"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    # Several runs may hash the same file at once, the last rename wins.
+    tmp = cache.with_name(f"{cache.name}.tmp{os.getpid()}")
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"stamp": stamp, "sha256": digest}, f, indent=2)
+        tmp.replace(cache)
+    except OSError:
+        # Not writable, the file is hashed again next time.
+        tmp.unlink(missing_ok=True)
+    return digest
+
+
+def checkpoint_key(inputs: Dict) -> str:
+    data = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class CheckpointCache:
+    """Maps the inputs of a setup run to its checkpoint directory."""
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+
+    def path(self, name: str, inputs: Dict) -> Path:
+        return self.base_dir / "{}-{}".format(name, checkpoint_key(inputs)[:16])
+
+    def lookup(self, name: str, inputs: Dict) -> Optional[Path]:
+        """Return the checkpoint for the inputs or None if it was not
+        taken (completely) yet."""
+        path = self.path(name, inputs)
+        manifest = self.manifest(path)
+        if manifest is None or manifest["key"] != checkpoint_key(inputs):
+            return None
+        return path
+
+    def commit(self, path, inputs: Dict) -> None:
+        """Mark the checkpoint in `path` as complete."""
+        path = Path(path)
+        tmp = path / (MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({
+                "key": checkpoint_key(inputs),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "inputs": inputs,
+            }, f, indent=2, default=str)
+        tmp.replace(path / MANIFEST)
+
+    def staging(self, name: str, inputs: Dict) -> Path:
+        """A private directory to write a checkpoint to before it is
+        published with `publish()`."""
+        path = self.path(name, inputs)
+        return path.with_name("{}.tmp{}".format(path.name, os.getpid()))
+
+    def publish(self, staging, name: str, inputs: Dict) -> bool:
+        """Move a complete checkpoint from its staging directory to its
+        final place. If another run published the same checkpoint in the
+        meantime the staged copy is dropped. Returns True if this copy
+        was published."""
+        self.commit(staging, inputs)
+        path = self.path(name, inputs)
+        if self.lookup(name, inputs) is None:
+            shutil.rmtree(path, ignore_errors=True)
+            try:
+                os.rename(staging, path)
+                return True
+            except OSError:
+                pass
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+
+    @staticmethod
+    def manifest(path) -> Optional[Dict]:
+        try:
+            with open(Path(path) / MANIFEST) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def entries(self, name: Optional[str] = None) -> List[Dict]:
+        """All complete checkpoints, optionally only the ones of `name`.
+        Newest first."""
+        entries = []
+        if not self.base_dir.exists():
+            return entries
+        for path in self.base_dir.iterdir():
+            manifest = self.manifest(path)
+            if manifest is None:
+                continue
+            if name is not None and path.name.rsplit("-", 1)[0] != name:
+                continue
+            manifest["path"] = str(path)
+            entries.append(manifest)
+        return sorted(entries, key=lambda m: m["created"], reverse=True)
+
+    def checkpoint_dirs(self) -> Iterator[Path]:
+        """All checkpoint directories including the SimPoint checkpoints,
+        without the ones still being staged."""
+        for cpt in sorted(self.base_dir.rglob("m5.cpt")):
+            path = cpt.parent
+            if ".tmp" not in path.name:
+                yield path
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.base_dir / CHUNK_DIR / digest[:2] / digest[2:]
+
+    def _store_chunk(self, data: bytes) -> Tuple[str, int]:
+        """Add a chunk to the store. Returns its hash and the number of
+        bytes newly written to the store."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if path.exists():
+            return digest, 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        packed = zlib.compress(data, 6)
+        tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+        tmp.write_bytes(packed)
+        tmp.replace(path)
+        return digest, len(packed)
+
+    @contextlib.contextmanager
+    def _locked(self, shared: bool) -> Iterator[None]:
+        """Lock of the chunk store: packs hold it shared, gc()
+        exclusively."""
+        lock = self.base_dir / CHUNK_DIR / LOCK
+        lock.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+
+    def pack_file(self, path) -> Tuple[int, int]:
+        """Replace a file by its chunk index. gzip compressed memory
+        images are chunked uncompressed. Returns the size of the file and
+        the number of bytes added to the chunk store."""
+        # The lock keeps gc() from removing the chunks before the index
+        # referring to them is written.
+        with self._locked(shared=True):
+            path = Path(path)
+            size = path.stat().st_size
+            with open(path, "rb") as f:
+                compressed = f.read(2) == b"\x1f\x8b"
+            opener = (gzip.open if compressed and path.suffix == ".pmem"
+                      else open)
+            chunks = []
+            raw_size = added = 0
+            with opener(path, "rb") as f:
+                while True:
+                    data = f.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    raw_size += len(data)
+                    if data.count(0) == len(data):
+                        chunks.append(None)
+                        continue
+                    digest, written = self._store_chunk(data)
+                    chunks.append(digest)
+                    added += written
+            index = path.with_name(path.name + CHUNK_INDEX)
+            tmp = index.with_name(index.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"size": raw_size, "chunk_size": CHUNK_SIZE,
+                           "chunks": chunks}, f)
+            tmp.replace(index)
+            path.unlink()
+            return size, added
+
+    def pack(self, path) -> Tuple[int, int]:
+        """Pack all large files of a checkpoint directory. Files that were
+        rebuilt or rewritten since the last pack are chunked again. The
+        m5.cpt stays in place, `restore_view()` reads it."""
+        size = added = 0
+        for file in sorted(Path(path).iterdir()):
+            if (file.is_file() and not file.name.endswith(CHUNK_INDEX)
+                    and file.name not in ["m5.cpt", MANIFEST]
+                    and file.stat().st_size >= PACK_MIN_SIZE):
+                s, a = self.pack_file(file)
+                size += s
+                added += a
+        return size, added
+
+    def materialize_file(self, index, into=None) -> Path:
+        """Rebuild a packed file from its chunk index, next to the index
+        or in the directory `into`. Returns the rebuilt file."""
+        index = Path(index)
+        path = Path(into or index.parent) / index.name[:-len(CHUNK_INDEX)]
+        with open(index) as f:
+            meta = json.load(f)
+        step = meta["chunk_size"]
+        # Several runs may restore the same checkpoint at once. Each
+        # builds its own copy and the last rename wins.
+        tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+        with open(tmp, "w+b") as f:
+            f.truncate(meta["size"])
+            if meta["size"]:
+                with mmap.mmap(f.fileno(), meta["size"]) as mem:
+                    for i, digest in enumerate(meta["chunks"]):
+                        if digest is None:
+                            continue
+                        data = zlib.decompress(
+                            self._chunk_path(digest).read_bytes())
+                        mem[i * step:i * step + len(data)] = data
+                    mem.flush()
+        tmp.replace(path)
+        return path
+
+    def materialize(self, path, into=None) -> List[Path]:
+        """Rebuild the packed files of a checkpoint directory that are
+        missing, in place or in the directory `into`. Returns the rebuilt
+        files."""
+        return [
+            self.materialize_file(index, into)
+            for index in sorted(Path(path).glob("*" + CHUNK_INDEX))
+            if not index.with_name(index.name[:-len(CHUNK_INDEX)]).exists()
+        ]
+
+    def gc(self) -> int:
+        """Remove the chunks no checkpoint refers to. Returns the number
+        of bytes freed. Waits for running packs to finish."""
+        with self._locked(shared=False):
+            used = set()
+            # Including the checkpoints still being staged.
+            for index in self.base_dir.rglob("*" + CHUNK_INDEX):
+                with open(index) as f:
+                    used.update(d for d in json.load(f)["chunks"] if d)
+            freed = 0
+            for chunk in (self.base_dir / CHUNK_DIR).glob("*/*"):
+                if chunk.parent.name + chunk.name not in used:
+                    freed += chunk.stat().st_size
+                    chunk.unlink()
+            return freed
+
+    @staticmethod
+    def restore_view(path, view,
+                     sections: Optional[Dict[str, str]] = None) -> Path:
+        """A private view of the checkpoint in `path` for one run: all
+        files are linked into `view`, only `m5.cpt` is copied with the
+        section prefixes in `sections` renamed. Lets a processor with
+        other SimObject names restore the checkpoint. Packed files are
+        rebuilt into the view with `materialize()`."""
+        path, view = Path(path).resolve(), Path(view)
+        shutil.rmtree(view, ignore_errors=True)
+        view.mkdir(parents=True)
+        for file in path.iterdir():
+            if (file.name not in ["m5.cpt", MANIFEST]
+                    and not file.name.endswith(CHUNK_INDEX)):
+                (view / file.name).symlink_to(file)
+        lines = (path / "m5.cpt").read_text().splitlines(keepends=True)
+        for i, line in enumerate(lines):
+            for old, new in (sections or {}).items():
+                if line.startswith("[" + old):
+                    lines[i] = "[" + new + line[len(old) + 1:]
+        (view / "m5.cpt").write_text("".join(lines))
+        return view
+
+    def explain_miss(self, name: str, inputs: Dict) -> str:
+        """Describe why there is no checkpoint for the inputs by comparing
+        them to the newest checkpoint with the same name."""
+        entries = self.entries(name)
+        if not entries:
+            return f"No checkpoint for '{name}' in {self.base_dir}."
+        newest = entries[0]
+        changed = sorted(
+            k for k in set(inputs) | set(newest["inputs"])
+            if json.dumps(inputs.get(k), default=str)
+            != json.dumps(newest["inputs"].get(k), default=str)
+        )
+        return (f"The newest checkpoint for '{name}' ({newest['path']}) was "
+                f"taken with different inputs: {', '.join(changed)}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List cached checkpoints")
+    parser.add_argument("checkpoint_dir", type=str,
+                        help="Checkpoint directory, e.g. wkdir/amd64/checkpoints")
+    parser.add_argument("-n", "--name", type=str, default=None,
+                        help="Only list checkpoints of this workload")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--pack", action="store_true", default=False,
+                        help="Move all checkpoints into the chunk store")
+    action.add_argument("--unpack", action="store_true", default=False,
+                        help="Rebuild the files of all packed checkpoints")
+    action.add_argument("--gc", action="store_true", default=False,
+                        help="Remove chunks no checkpoint refers to")
+    cli = parser.parse_args()
+
+    cache = CheckpointCache(cli.checkpoint_dir)
+    if cli.pack:
+        for path in cache.checkpoint_dirs():
+            size, added = cache.pack(path)
+            if size:
+                print(f"{path}: {size / (1 << 20):.0f}MiB packed, "
+                      f"{added / (1 << 20):.1f}MiB added to the store")
+        cache.gc()
+        raise SystemExit(0)
+    if cli.unpack:
+        for path in cache.checkpoint_dirs():
+            if cache.materialize(path):
+                print(f"{path}: rebuilt")
+        raise SystemExit(0)
+    if cli.gc:
+        print(f"{cache.gc() / (1 << 20):.1f}MiB freed")
+        raise SystemExit(0)
+
+    for entry in cache.entries(cli.name):
+        inputs = entry["inputs"]
+        print(f"{entry['path']}  {entry['created']}  "
+              f"{inputs.get('isa')} cores={inputs.get('num_cores')}")
@@ -0,0 +1,104 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Online convergence check of interval metrics.
+
+Every measured interval adds one sample per metric. A metric has converged
+once the half width of the confidence interval of its mean, relative to the
+mean, is below the requested relative error. The eval run stops as soon as
+all tracked metrics have converged.
+"""
+import math
+from statistics import NormalDist, mean, stdev
+from typing import Dict, List
+
+
+# Two sided critical values of the Student t distribution for 1 to 30
+# degrees of freedom.
+_T_TABLE = {
+    0.90: [6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833,
+           1.812, 1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734,
+           1.729, 1.725, 1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703,
+           1.701, 1.699, 1.697],
+    0.95: [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+           2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+           2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052,
+           2.048, 2.045, 2.042],
+    0.99: [63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250,
+           3.169, 3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878,
+           2.861, 2.845, 2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771,
+           2.763, 2.756, 2.750],
+}
+
+
+def t_critical(confidence: float, df: int) -> float:
+    """Two sided critical value of the t distribution. Uses the table for
+    small sample counts and a Cornish-Fisher expansion otherwise."""
+    if confidence in _T_TABLE and df <= len(_T_TABLE[confidence]):
+        return _T_TABLE[confidence][df - 1]
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return z + (z**3 + z) / (4 * df)
+
+
+class ConvergenceTracker:
+    """Collects per interval samples and decides when to stop."""
+
+    def __init__(self, metrics: List[str], rel_error: float,
+                 confidence: float = 0.95, min_intervals: int = 5):
+        self.metrics = metrics
+        self.rel_error = rel_error
+        self.confidence = confidence
+        self.min_intervals = max(min_intervals, 2)
+        self.samples: Dict[str, List[float]] = {m: [] for m in metrics}
+
+    def add(self, values: Dict[str, float]) -> None:
+        for m in self.metrics:
+            v = values.get(m, math.nan)
+            if not math.isnan(v):
+                self.samples[m].append(v)
+
+    def error(self, metric: str) -> float:
+        """Relative half width of the confidence interval of the mean."""
+        s = self.samples[metric]
+        if len(s) < 2:
+            return math.inf
+        m = mean(s)
+        if m == 0:
+            return 0.0 if stdev(s) == 0 else math.inf
+        t = t_critical(self.confidence, len(s) - 1)
+        return abs(t * stdev(s) / math.sqrt(len(s)) / m)
+
+    def converged(self) -> bool:
+        return all(
+            len(self.samples[m]) >= self.min_intervals
+            and self.error(m) <= self.rel_error
+            for m in self.metrics
+        )
+
+    def summary(self) -> str:
+        parts = []
+        for m in self.metrics:
+            s = self.samples[m]
+            if s:
+                parts.append(f"{m}: {mean(s):.4f} +- {self.error(m):.2%} "
+                             f"({len(s)} intervals)")
+        return ", ".join(parts)
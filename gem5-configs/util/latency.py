@@ -0,0 +1,140 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Request latency histograms written by the http client (`--latency-hist`).
+
+The client sorts every measured request latency into a log-linear bucket:
+values below 2^subbits microseconds have their own bucket, every further
+power of two is split into 2^subbits buckets. The histogram is copied to
+`latency.hist` in the gem5 output directory with `m5 writefile`. Latencies
+are in simulated time.
+
+Usage
+-----
+
+```
+python3 -m util.latency <results-dir> [<results-dir> ...]
+```
+
+"""
+import argparse
+from pathlib import Path
+from typing import Dict, Tuple
+
+
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class LatencyHistogram:
+    def __init__(self, counts: Dict[int, int], subbits: int,
+                 total: int = 0, sum_us: int = 0, max_us: int = 0):
+        self.counts = dict(sorted(counts.items()))
+        self.subbits = subbits
+        self.count = total or sum(counts.values())
+        self.sum = sum_us
+        self.max = max_us
+
+    @classmethod
+    def load(cls, path) -> "LatencyHistogram":
+        header = {}
+        counts = {}
+        with open(path) as f:
+            for line in f:
+                if line.startswith("#") or not line.strip():
+                    continue
+                key, value = line.split()
+                if key.isdigit():
+                    counts[int(key)] = int(value)
+                else:
+                    header[key] = value
+        if header.get("unit", "us") != "us":
+            raise ValueError(f"{path}: unsupported unit {header['unit']}")
+        return cls(counts, int(header["subbits"]), int(header["count"]),
+                   int(header["sum"]), int(header["max"]))
+
+    def bounds(self, bucket: int) -> Tuple[int, int]:
+        """Lower (inclusive) and upper (exclusive) bound of a bucket in
+        microseconds."""
+        sub = 1 << self.subbits
+        if bucket < sub:
+            return bucket, bucket + 1
+        shift = bucket // sub - 1
+        low = (bucket % sub + sub) << shift
+        return low, low + (1 << shift)
+
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else float("nan")
+
+    def percentile(self, p: float) -> float:
+        """The p-th percentile in microseconds, interpolated linearly
+        within its bucket."""
+        if not self.count:
+            return float("nan")
+        target = p / 100 * self.count
+        seen = 0
+        for bucket, n in self.counts.items():
+            if seen + n >= target:
+                low, high = self.bounds(bucket)
+                return min(low + (high - low) * (target - seen) / n, self.max)
+            seen += n
+        return float(self.max)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        if other.subbits != self.subbits:
+            raise ValueError("Histograms with different resolution")
+        counts = dict(self.counts)
+        for bucket, n in other.counts.items():
+            counts[bucket] = counts.get(bucket, 0) + n
+        return LatencyHistogram(counts, self.subbits,
+                                self.count + other.count,
+                                self.sum + other.sum,
+                                max(self.max, other.max))
+
+
+def load_latency(run_dir) -> LatencyHistogram:
+    return LatencyHistogram.load(Path(run_dir) / "latency.hist")
+
+
+def summary(hist: LatencyHistogram) -> Dict[str, float]:
+    """Count, mean, max and the common percentiles in microseconds."""
+    result = {"count": hist.count, "mean": hist.mean(), "max": hist.max}
+    for p in PERCENTILES:
+        result[f"p{p:g}"] = hist.percentile(p)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Summarize request latency histograms"
+    )
+    parser.add_argument("runs", type=str, nargs="+",
+                        help="Results directories or latency.hist files")
+    cli = parser.parse_args()
+
+    columns = ["count", "mean"] + [f"p{p:g}" for p in PERCENTILES] + ["max"]
+    print(f"{'run':<40} " + " ".join(f"{c:>10}" for c in columns))
+    for run in cli.runs:
+        path = Path(run)
+        hist = LatencyHistogram.load(path if path.is_file()
+                                     else path / "latency.hist")
+        s = summary(hist)
+        print(f"{run:<40} " + " ".join(f"{s[c]:>10.0f}" for c in columns))
@@ -0,0 +1,235 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Derived metrics of the measured core from a single stats dump block.
+
+The measured core is the last core of the processor. Its stats live under
+`board.processor.cores1.core` for a simple processor and under
+`board.processor.switch1.core` after switching from a warmup core.
+`measured_core()` finds it by looking for the core that committed the most
+instructions in the block.
+"""
+import math
+import re
+from typing import Dict, Iterable, Optional
+
+
+MEASURED_CORE = "board.processor.cores1.core"
+
+_CORE_RE = re.compile(r"^(board\.processor\.[a-z]+(\d+)\.core)\.numCycles$")
+_SUB_PF_RE = re.compile(r"\.prefetchers\d+\.")
+
+
+def value(block: Dict[str, float], *names: str,
+          default: float = math.nan) -> float:
+    """The value of the first stat in `names` present in the block."""
+    for name in names:
+        if name in block:
+            return block[name]
+    return default
+
+
+def insts(block: Dict[str, float], core: str) -> float:
+    return value(block, f"{core}.commitStats0.numInsts",
+                 f"{core}.committedInsts",
+                 f"{core}.exec_context.thread_0.numInsts")
+
+
+def cycles(block: Dict[str, float], core: str) -> float:
+    return value(block, f"{core}.numCycles")
+
+
+def cores(block: Dict[str, float]) -> Dict[int, str]:
+    """Stats prefixes of all cores in the block by core index. Of a
+    switchable processor only the cores that committed instructions."""
+    found: Dict[int, str] = {}
+    for name in block:
+        m = _CORE_RE.match(name)
+        if m is None:
+            continue
+        index = int(m.group(2))
+        n = insts(block, m.group(1))
+        if index not in found or n > insts(block, found[index]):
+            found[index] = m.group(1)
+    return dict(sorted(found.items()))
+
+
+def measured_core(block: Dict[str, float]) -> str:
+    """Stats prefix of the core that committed the most instructions."""
+    best = (MEASURED_CORE, -1.0)
+    for name in block:
+        m = _CORE_RE.match(name)
+        if m is None:
+            continue
+        n = insts(block, m.group(1))
+        if not math.isnan(n) and n > best[1]:
+            best = (m.group(1), n)
+    return best[0]
+
+
+def core_index(core: str) -> str:
+    """Index of a core as it appears in its name. gem5 zero pads the names
+    of the cores and their caches alike with more than 10 cores."""
+    return re.search(r"(\d+)\.core$", core).group(1)
+
+
+def l1i(core: str) -> str:
+    """Stats prefix of the L1 instruction cache of a core."""
+    return f"board.cache_hierarchy.l1icaches{core_index(core)}"
+
+
+def l2(core: str) -> str:
+    """Stats prefix of the private L2 cache of a core."""
+    return f"board.cache_hierarchy.l2caches{core_index(core)}"
+
+
+L3 = "board.cache_hierarchy.l3cache"
+
+
+def _div(a: float, b: float) -> float:
+    if b == 0 or math.isnan(b):
+        return math.nan
+    return a / b
+
+
+def ipc(block: Dict[str, float], core: Optional[str] = None) -> float:
+    core = core or measured_core(block)
+    return _div(insts(block, core), cycles(block, core))
+
+
+def l1i_mpki(block: Dict[str, float], core: Optional[str] = None) -> float:
+    core = core or measured_core(block)
+    misses = value(block, f"{l1i(core)}.overallMisses::total",
+                   f"{l1i(core)}.demandMisses::total")
+    return _div(1000 * misses, insts(block, core))
+
+
+def l2_mpki(block: Dict[str, float], core: Optional[str] = None) -> float:
+    core = core or measured_core(block)
+    misses = value(block, f"{l2(core)}.demandMisses::total",
+                   f"{l2(core)}.overallMisses::total")
+    return _div(1000 * misses, insts(block, core))
+
+
+def l2_inst_mpki(block: Dict[str, float],
+                 core: Optional[str] = None) -> float:
+    """L2 misses of instruction fetches (including L1I prefetches)."""
+    core = core or measured_core(block)
+    prefix = f"{l2(core)}.overallMisses::"
+    misses = sum(v for name, v in block.items()
+                 if name.startswith(prefix)
+                 and (name.endswith(".inst") or name.startswith(
+                     f"{prefix}{l1i(core)}.prefetcher")))
+    return _div(1000 * misses, insts(block, core))
+
+
+def l3_mpki(block: Dict[str, float], core: Optional[str] = None) -> float:
+    """Misses of the shared L3 (of all cores) per kilo instruction of the
+    measured core. NaN without L3."""
+    core = core or measured_core(block)
+    misses = value(block, f"{L3}.demandMisses::total",
+                   f"{L3}.overallMisses::total")
+    return _div(1000 * misses, insts(block, core))
+
+
+def icache_stall(block: Dict[str, float],
+                 core: Optional[str] = None) -> float:
+    """Fraction of cycles fetch was stalled waiting for the L1I."""
+    core = core or measured_core(block)
+    stalls = value(block, f"{core}.fetch.icacheStallCycles")
+    return _div(stalls, cycles(block, core))
+
+
+def branch_mpki(block: Dict[str, float], core: Optional[str] = None) -> float:
+    core = core or measured_core(block)
+    mispredicts = value(block, f"{core}.commit.branchMispredicts",
+                        f"{core}.branchPred.condIncorrect")
+    return _div(1000 * mispredicts, insts(block, core))
+
+
+def _prefetcher_stat(block: Dict[str, float], pf: str, stat: str) -> float:
+    """A prefetcher stat of the L1I. A prefetcher stack reports it per
+    prefetcher, which is summed up unless the stack reports a total."""
+    total = block.get(f"{pf}.{stat}", 0.0)
+    if total:
+        return total
+    return sum(v for name, v in block.items()
+               if name.startswith(pf + ".prefetchers")
+               and name.endswith("." + stat)
+               and not _SUB_PF_RE.search(name[len(pf) + 12:]))
+
+
+def prefetch(block: Dict[str, float],
+             core: Optional[str] = None) -> Dict[str, float]:
+    """Issued and useful L1I prefetches with accuracy (useful / issued)
+    and coverage (useful / (useful + remaining demand misses))."""
+    core = core or measured_core(block)
+    pf = f"{l1i(core)}.prefetcher"
+    issued = _prefetcher_stat(block, pf, "pfIssued")
+    useful = _prefetcher_stat(block, pf, "pfUseful")
+    misses = value(block, f"{l1i(core)}.demandMisses::total",
+                   f"{l1i(core)}.overallMisses::total", default=0.0)
+    return {
+        "pf_issued": issued,
+        "pf_useful": useful,
+        "pf_accuracy": _div(useful, issued),
+        "pf_coverage": _div(useful, useful + misses),
+    }
+
+
+def accumulate(blocks: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    """Sum up the stats of several dumps into one block covering all of
+    them. Only meaningful for counters, not for ratios."""
+    total: Dict[str, float] = {}
+    for block in blocks:
+        for name, v in block.items():
+            if not math.isnan(v):
+                total[name] = total.get(name, 0.0) + v
+    return total
+
+
+def per_core_metrics(block: Dict[str, float]) -> Dict[int, Dict[str, float]]:
+    """`interval_metrics()` of every core by core index."""
+    return {i: interval_metrics(block, core) for i, core in cores(block).items()}
+
+
+def throughput(block: Dict[str, float], indices: Iterable[int]) -> float:
+    """Instructions of the given cores together per cycle."""
+    found = cores(block)
+    selected = [found[i] for i in indices if i in found]
+    if not selected:
+        return math.nan
+    total = sum(insts(block, core) for core in selected)
+    return _div(total, max(cycles(block, core) for core in selected))
+
+
+def interval_metrics(block: Dict[str, float],
+                     core: Optional[str] = None) -> Dict[str, float]:
+    """The key metrics of one interval."""
+    core = core or measured_core(block)
+    return {
+        "insts": insts(block, core),
+        "cycles": cycles(block, core),
+        "ipc": ipc(block, core),
+        "l1i_mpki": l1i_mpki(block, core),
+        "branch_mpki": branch_mpki(block, core),
+    }
@@ -0,0 +1,111 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Cache miss curves from a cache size sweep.
+
+Reads the jobs of a sweep over a cache size parameter (e.g. `l2-size`) and
+prints the L1I, L2 and L3 MPKI and the IPC of the measured core per workload
+and size. The parameter value of every job is taken from the `params.json`
+written by `scripts/sweep.py`.
+
+Usage
+-----
+
+```
+python3 scripts/sweep.py -e l2-curve -w mediawiki -p l2-size=256KiB,512KiB,1MiB,2MiB
+python3 -m util.misscurve results/amd64/l2-curve --param l2-size
+```
+
+"""
+import argparse
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, List
+
+from .metrics import (accumulate, ipc, l1i_mpki, l2_inst_mpki, l2_mpki,
+                      l3_mpki, measured_core)
+from .stats import load_stats
+
+
+METRICS = ["l1i_mpki", "l2_mpki", "l2_inst_mpki", "l3_mpki", "ipc"]
+
+_UNITS = {"": 1, "B": 1, "KiB": 1 << 10, "MiB": 1 << 20, "GiB": 1 << 30,
+          "kB": 10**3, "KB": 10**3, "MB": 10**6, "GB": 10**9}
+
+
+def size_bytes(size) -> float:
+    """Sort key of a size like `512KiB`. Non-size values sort last."""
+    m = re.fullmatch(r"\s*([\d.]+)\s*([A-Za-z]*)\s*", str(size))
+    if m is None or m.group(2) not in _UNITS:
+        return math.inf
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+
+def curve_point(run_dir) -> Dict[str, float]:
+    total = accumulate(load_stats(run_dir).blocks())
+    core = measured_core(total)
+    return {
+        "l1i_mpki": l1i_mpki(total, core),
+        "l2_mpki": l2_mpki(total, core),
+        "l2_inst_mpki": l2_inst_mpki(total, core),
+        "l3_mpki": l3_mpki(total, core),
+        "ipc": ipc(total, core),
+    }
+
+
+def miss_curves(experiment_dir, param: str) -> Dict[str, List]:
+    """workload -> [(param value, metrics)] sorted by size."""
+    curves: Dict[str, List] = {}
+    for params_file in sorted(Path(experiment_dir).glob("*/params.json")):
+        with open(params_file) as f:
+            job = json.load(f)
+        if param not in job["params"]:
+            continue
+        try:
+            point = curve_point(params_file.parent)
+        except FileNotFoundError:
+            continue
+        curves.setdefault(job["workload"], []).append(
+            (job["params"][param], point))
+    for points in curves.values():
+        points.sort(key=lambda p: size_bytes(p[0]))
+    return curves
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Print cache miss curves of a cache size sweep"
+    )
+    parser.add_argument("experiment", type=str,
+                        help="Experiment directory of the sweep")
+    parser.add_argument("--param", type=str, default="l2-size",
+                        help="Swept parameter")
+    cli = parser.parse_args()
+
+    for workload, points in miss_curves(cli.experiment, cli.param).items():
+        print(workload)
+        print(f"  {cli.param:>12} " + " ".join(f"{m:>12}" for m in METRICS))
+        for value, point in points:
+            print(f"  {value:>12} " + " ".join(
+                f"{point[m]:12.4f}" for m in METRICS))
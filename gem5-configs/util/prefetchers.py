@@ -0,0 +1,99 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+L1 instruction prefetcher stacks.
+
+A stack is given as an ordered, `+` separated list of prefetchers, each
+optionally followed by `:<param>=<value>` pairs, e.g. `fdp+tagged:degree=4`.
+The prefetchers are combined in a `MultiPrefetcher` which asks them for
+prefetches in the given order. Known names:
+
+- `none`: no instruction prefetcher.
+- `fdp`: the fetch directed prefetcher. Requires `--fdp`.
+- `tagged`: tagged next-N-line prefetcher (`degree` lines ahead).
+- `nextline`: `tagged` with degree 1.
+- `pif`: proactive instruction fetch, trained on the instructions the core
+  retires.
+
+Any other name is taken as a gem5 prefetcher class, e.g. `BOPPrefetcher`.
+Only `build_stack()` needs gem5, the specs can also be parsed on the host.
+"""
+from typing import Dict, List, Tuple
+
+
+_ALIASES = {
+    "fdp": ("FetchDirectedPrefetcher", {}),
+    "tagged": ("TaggedPrefetcher", {}),
+    "nextline": ("TaggedPrefetcher", {"degree": 1}),
+    "pif": ("PIFPrefetcher", {}),
+}
+
+
+def _value(text: str):
+    for conv in (int, float):
+        try:
+            return conv(text)
+        except ValueError:
+            pass
+    if text.lower() in ["true", "false"]:
+        return text.lower() == "true"
+    return text
+
+
+def parse_stack(spec: str) -> List[Tuple[str, Dict]]:
+    """Split a stack spec into (name, params) pairs."""
+    stack = []
+    for part in spec.split("+"):
+        name, *params = part.split(":")
+        if name == "none":
+            continue
+        stack.append((name, dict(
+            (key, _value(value))
+            for key, _, value in (p.partition("=") for p in params)
+        )))
+    return stack
+
+
+def uses_fdp(spec: str) -> bool:
+    return any(name == "fdp" for name, _ in parse_stack(spec))
+
+
+def build_stack(spec: str, cpu) -> List:
+    """Instantiate the prefetchers of a stack for the L1I of `cpu`."""
+    import m5.objects
+
+    prefetchers = []
+    for name, params in parse_stack(spec):
+        name, defaults = _ALIASES.get(name, (name, {}))
+        params = defaults | params
+        cls = getattr(m5.objects, name, None)
+        if cls is None:
+            raise ValueError(f"Unknown prefetcher: {name}")
+        if issubclass(cls, m5.objects.FetchDirectedPrefetcher):
+            params["cpu"] = cpu
+        pf = cls(use_virtual_addresses=True, **params)
+        if issubclass(cls, m5.objects.PIFPrefetcher):
+            # PIF records the retired instructions through the
+            # RetiredInstsPC probe of the core.
+            pf.listenFromProbeRetiredInstructions(cpu)
+        prefetchers.append(pf)
+    return prefetchers
@@ -0,0 +1,280 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+SQLite index over all results directories.
+
+`ingest` walks a results tree (`results/<arch>/<experiment>/<job>/`) and
+stores for every run with stats its configuration and the key metrics of the
+measured core, for the whole run and for every interval:
+
+- `runs`: one row per run with workload, ISA, CPU type, FDP, mode, job
+  state and the metrics over all intervals.
+- `run_params`: the further `fs-fdp.py` parameters of a run, one row each.
+- `intervals`: the metrics of every stats dump. For `--roi` runs `kind`
+  tells request batches (`roi`) and the gaps between them apart.
+
+The configuration is taken from the `params.json` written by
+`scripts/sweep.py` and otherwise from the `cmd.txt` of the run. Runs whose
+stats did not change since the last ingest are skipped.
+
+Usage
+-----
+
+```
+python3 -m util.resultsdb ingest ../results
+python3 -m util.resultsdb query "SELECT experiment, job, l1i_mpki FROM runs
+    WHERE fdp = 1 AND workload = 'mediawiki'"
+```
+
+"""
+import argparse
+import csv
+import json
+import math
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from .metrics import (accumulate, branch_mpki, cycles, icache_stall, insts,
+                      ipc, l1i_mpki, l2_mpki, measured_core)
+from .stats import load_stats, make_filter
+
+
+DEFAULT_DB = "../results/index.sqlite"
+
+STATS_FILES = ["stats.cols", "stats.txt", "stats.h5"]
+
+# Only the stats the metrics need are loaded.
+_KEEP = make_filter(include=["board.processor.",
+                             "board.cache_hierarchy.l1icaches",
+                             "board.cache_hierarchy.l2caches"])
+
+METRICS = ["insts", "cycles", "ipc", "l1i_mpki", "l2_mpki", "branch_mpki",
+           "icache_stall"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    arch TEXT,
+    experiment TEXT,
+    job TEXT,
+    workload TEXT,
+    isa TEXT,
+    cpu_type TEXT,
+    fdp INTEGER,
+    mode TEXT,
+    state TEXT,
+    intervals INTEGER,
+    signature TEXT,
+    {", ".join(f"{m} REAL" for m in METRICS)}
+);
+CREATE TABLE IF NOT EXISTS run_params (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    kind TEXT,
+    {", ".join(f"{m} REAL" for m in METRICS)},
+    PRIMARY KEY (run_id, idx)
+);
+CREATE INDEX IF NOT EXISTS runs_workload ON runs (workload, isa, fdp);
+CREATE INDEX IF NOT EXISTS runs_experiment ON runs (experiment);
+CREATE INDEX IF NOT EXISTS run_params_name ON run_params (name, value);
+"""
+
+
+def connect(path) -> sqlite3.Connection:
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA foreign_keys = ON")
+    db.executescript(SCHEMA)
+    return db
+
+
+def metrics(block: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """The indexed metrics of a block. NaN is stored as NULL."""
+    core = measured_core(block)
+    values = {
+        "insts": insts(block, core),
+        "cycles": cycles(block, core),
+        "ipc": ipc(block, core),
+        "l1i_mpki": l1i_mpki(block, core),
+        "l2_mpki": l2_mpki(block, core),
+        "branch_mpki": branch_mpki(block, core),
+        "icache_stall": icache_stall(block, core),
+    }
+    return {k: None if math.isnan(v) else v for k, v in values.items()}
+
+
+def run_dirs(root) -> Iterator[Path]:
+    seen = set()
+    for name in STATS_FILES:
+        for stats in Path(root).rglob(name):
+            if stats.parent not in seen:
+                seen.add(stats.parent)
+                yield stats.parent
+
+
+def signature(run_dir: Path) -> str:
+    parts = []
+    for name in STATS_FILES + ["status.json"]:
+        path = run_dir / name
+        if path.exists():
+            st = path.stat()
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+    return ";".join(parts)
+
+
+def _from_cmd(run_dir: Path) -> Dict:
+    """The configuration of a run not started by sweep.py."""
+    config = {"params": {}}
+    try:
+        words = (run_dir / "cmd.txt").read_text().split()
+    except OSError:
+        return config
+    options = {}
+    for i, word in enumerate(words):
+        if not word.startswith("--"):
+            continue
+        key, _, value = word[2:].partition("=")
+        if (not value and i + 1 < len(words)
+                and not words[i + 1].startswith("--")):
+            value = words[i + 1]
+        options[key] = value or True
+    config["workload"] = options.get("workload")
+    config["isa"] = options.get("isa")
+    config["cpu_type"] = options.get("cpu-type")
+    config["fdp"] = "fdp" in options
+    config["mode"] = options.get("mode")
+    return config
+
+
+def run_config(run_dir: Path) -> Dict:
+    try:
+        with open(run_dir / "params.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return _from_cmd(run_dir)
+
+
+def _roi_kinds(run_dir: Path) -> Dict[int, str]:
+    try:
+        with open(run_dir / "roi.csv") as f:
+            return {int(row["dump"]): row["kind"] for row in csv.DictReader(f)}
+    except OSError:
+        return {}
+
+
+def ingest_run(db: sqlite3.Connection, root: Path, run_dir: Path,
+               force: bool = False) -> bool:
+    """Add or update one run. Returns False if it was up to date."""
+    sig = signature(run_dir)
+    path = str(run_dir.resolve())
+    row = db.execute("SELECT signature FROM runs WHERE path = ?",
+                     (path,)).fetchone()
+    if row is not None and row[0] == sig and not force:
+        return False
+
+    try:
+        blocks = list(load_stats(run_dir, _KEEP).blocks())
+    except (FileNotFoundError, ValueError):
+        return False
+    config = run_config(run_dir)
+    try:
+        with open(run_dir / "status.json") as f:
+            state = json.load(f)["state"]
+    except (OSError, ValueError, KeyError):
+        state = None
+    parts = run_dir.relative_to(root).parts
+    arch, experiment = (parts[0], parts[1]) if len(parts) >= 3 else (None, None)
+    total = metrics(accumulate(blocks)) if blocks else dict.fromkeys(METRICS)
+
+    db.execute("DELETE FROM runs WHERE path = ?", (path,))
+    cur = db.execute(
+        f"INSERT INTO runs (path, arch, experiment, job, workload, isa, "
+        f"cpu_type, fdp, mode, state, intervals, signature, "
+        f"{', '.join(METRICS)}) "
+        f"VALUES ({', '.join('?' * (12 + len(METRICS)))})",
+        (path, arch, experiment, run_dir.name, config.get("workload"),
+         config.get("isa"), config.get("cpu_type"),
+         int(bool(config.get("fdp"))), config.get("mode"), state,
+         len(blocks), sig, *(total[m] for m in METRICS)),
+    )
+    run_id = cur.lastrowid
+    db.executemany(
+        "INSERT INTO run_params (run_id, name, value) VALUES (?, ?, ?)",
+        [(run_id, name, value if isinstance(value, (int, float, str))
+          else json.dumps(value))
+         for name, value in config.get("params", {}).items()],
+    )
+    kinds = _roi_kinds(run_dir)
+    db.executemany(
+        f"INSERT INTO intervals (run_id, idx, kind, {', '.join(METRICS)}) "
+        f"VALUES ({', '.join('?' * (3 + len(METRICS)))})",
+        [(run_id, i, kinds.get(i), *metrics(block).values())
+         for i, block in enumerate(blocks)],
+    )
+    return True
+
+
+def ingest(db: sqlite3.Connection, root, force: bool = False) -> int:
+    """Ingest all runs below `root`. Returns the number of updated runs."""
+    root = Path(root).resolve()
+    updated = 0
+    for run_dir in run_dirs(root):
+        if ingest_run(db, root, run_dir, force):
+            updated += 1
+            print(f"Ingested {run_dir.relative_to(root)}")
+            db.commit()
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Index results directories in an SQLite database"
+    )
+    parser.add_argument("--db", type=str, default=DEFAULT_DB,
+                        help="Database file.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("ingest", help="Add the runs of a results tree")
+    p.add_argument("results", type=str, help="Results directory")
+    p.add_argument("--force", action="store_true", default=False,
+                   help="Ingest runs again even if their stats did not "
+                        "change.")
+    p = sub.add_parser("query", help="Run an SQL query")
+    p.add_argument("sql", type=str, help="SQL statement")
+    cli = parser.parse_args()
+
+    db = connect(cli.db)
+    if cli.command == "ingest":
+        n = ingest(db, cli.results, cli.force)
+        print(f"{n} runs updated in {cli.db}")
+    else:
+        cur = db.execute(cli.sql)
+        if cur.description:
+            print("\t".join(d[0] for d in cur.description))
+        for row in cur:
+            print("\t".join("" if v is None else str(v) for v in row))
@@ -0,0 +1,107 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Multi-core scaling of a core count sweep.
+
+For every run of a sweep over `num-cores` (and optionally `server-cores`)
+the aggregate IPC of the server cores, their per core IPC, L2 MPKI and the
+L3 MPKI are printed, together with the speedup and parallel efficiency
+relative to the run with the fewest server cores of the same workload.
+
+Usage
+-----
+
+```
+python3 scripts/sweep.py -e scaling -w nodeapp -p num-cores=2,3,5,9
+python3 -m util.scaling ../results/amd64/scaling
+```
+
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List
+
+from .metrics import (accumulate, l2_mpki, l3_mpki, per_core_metrics,
+                      throughput, cores)
+from .stats import load_stats
+
+
+def scaling_point(run_dir, num_cores: int, server_cores: int) -> Dict:
+    total = accumulate(load_stats(run_dir).blocks())
+    servers = list(range(num_cores - server_cores, num_cores))
+    per_core = per_core_metrics(total)
+    found = cores(total)
+    l2 = [l2_mpki(total, found[i]) for i in servers if i in found]
+    return {
+        "num_cores": num_cores,
+        "server_cores": server_cores,
+        "throughput": throughput(total, servers),
+        "ipc": [per_core[i]["ipc"] for i in servers if i in per_core],
+        "l2_mpki": sum(l2) / len(l2) if l2 else float("nan"),
+        "l3_mpki": (l3_mpki(total, found[servers[-1]])
+                    if servers[-1] in found else float("nan")),
+    }
+
+
+def scaling(experiment_dir) -> Dict[str, List[Dict]]:
+    """workload -> scaling points sorted by the number of server cores."""
+    runs: Dict[str, List[Dict]] = {}
+    for params_file in sorted(Path(experiment_dir).glob("*/params.json")):
+        with open(params_file) as f:
+            job = json.load(f)
+        num_cores = int(job["params"].get("num-cores", 2))
+        server_cores = int(job["params"].get("server-cores")
+                           or num_cores - 1)
+        try:
+            point = scaling_point(params_file.parent, num_cores, server_cores)
+        except FileNotFoundError:
+            continue
+        runs.setdefault(job["workload"], []).append(point)
+    for points in runs.values():
+        points.sort(key=lambda p: p["server_cores"])
+        base = points[0]
+        for p in points:
+            p["speedup"] = p["throughput"] / base["throughput"]
+            p["efficiency"] = (p["speedup"] * base["server_cores"]
+                               / p["server_cores"])
+    return runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Print the multi-core scaling of a core count sweep"
+    )
+    parser.add_argument("experiment", type=str,
+                        help="Experiment directory of the sweep")
+    cli = parser.parse_args()
+
+    for workload, points in scaling(cli.experiment).items():
+        print(workload)
+        print(f"  {'cores':>5} {'server':>6} {'agg. IPC':>9} {'speedup':>8} "
+              f"{'eff.':>6} {'L2 MPKI':>8} {'L3 MPKI':>8}  per core IPC")
+        for p in points:
+            print(f"  {p['num_cores']:5d} {p['server_cores']:6d} "
+                  f"{p['throughput']:9.3f} {p['speedup']:8.2f} "
+                  f"{p['efficiency']:6.1%} {p['l2_mpki']:8.3f} "
+                  f"{p['l3_mpki']:8.3f}  "
+                  + " ".join(f"{v:.3f}" for v in p["ipc"]))
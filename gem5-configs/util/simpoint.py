@@ -0,0 +1,302 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+SimPoint clustering of basic block vectors (BBVs).
+
+The `profile` mode of `fs-fdp.py` writes the BBV of every interval to
+`simpoint.bb.gz`. This module clusters the intervals into phases following
+the SimPoint 3.0 approach (random projection, k-means, BIC based selection
+of k) and writes the `simpoints` and `weights` files next to the checkpoints
+of the workload. The `simpoints` mode of `fs-fdp.py` then takes one checkpoint
+per SimPoint and `--simpoint <n>` evaluates a single one of them.
+
+Finally, the per SimPoint results are combined into a whole run estimate
+weighted by the size of the clusters.
+
+Usage
+-----
+
+```
+python3 -m util.simpoint cluster <profile-outdir>/simpoint.bb.gz \
+    -o <checkpoint>-simpoints
+python3 -m util.simpoint combine <checkpoint>-simpoints \
+    "results/<arch>/<experiment>/<workload>/sp{}"
+```
+
+"""
+import argparse
+import gzip
+import math
+import random
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+# Number of dimensions the BBVs are projected to. Same default as the
+# SimPoint tool.
+PROJECTION_DIMS = 15
+
+# Pick the smallest k whose BIC score reaches this fraction of the
+# best score seen.
+BIC_THRESHOLD = 0.9
+
+
+SimPoint = namedtuple(
+    "SimPoint", ["index", "interval", "weight", "start", "warmup"]
+)
+
+
+def read_bbv(path) -> List[Dict[int, int]]:
+    """Read a gem5 BBV file. Each interval is a line of the form
+    `T:<bb>:<count> :<bb>:<count> ...`."""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    bbvs = []
+    with opener(path, "rt") as f:
+        for line in f:
+            if not line.startswith("T"):
+                continue
+            vec = {}
+            for tok in line[1:].split():
+                _, bb, cnt = tok.split(":")
+                vec[int(bb)] = vec.get(int(bb), 0) + int(cnt)
+            bbvs.append(vec)
+    return bbvs
+
+
+def project(bbvs: List[Dict[int, int]], dims: int = PROJECTION_DIMS,
+            seed: int = 42) -> List[List[float]]:
+    """Normalise every BBV and reduce it to `dims` dimensions with a
+    random linear projection."""
+    rng = random.Random(seed)
+    matrix: Dict[int, List[float]] = {}
+    points = []
+    for vec in bbvs:
+        total = sum(vec.values()) or 1
+        p = [0.0] * dims
+        for bb, cnt in vec.items():
+            row = matrix.get(bb)
+            if row is None:
+                row = [rng.uniform(-1.0, 1.0) for _ in range(dims)]
+                matrix[bb] = row
+            w = cnt / total
+            for d in range(dims):
+                p[d] += w * row[d]
+        points.append(p)
+    return points
+
+
+def _dist(a: List[float], b: List[float]) -> float:
+    return sum((x - y) * (x - y) for x, y in zip(a, b))
+
+
+def kmeans(points: List[List[float]], k: int, seed: int = 0,
+           max_iter: int = 100) -> Tuple[List[int], List[List[float]]]:
+    """Plain k-means with furthest-first initialisation. Returns the cluster
+    label of every point and the centroids."""
+    rng = random.Random(seed)
+    centroids = [list(points[rng.randrange(len(points))])]
+    mind = [_dist(p, centroids[0]) for p in points]
+    while len(centroids) < k:
+        far = max(range(len(points)), key=mind.__getitem__)
+        centroids.append(list(points[far]))
+        mind = [min(m, _dist(p, centroids[-1])) for m, p in zip(mind, points)]
+
+    labels = [0] * len(points)
+    for it in range(max_iter):
+        new = [min(range(k), key=lambda c: _dist(p, centroids[c]))
+               for p in points]
+        if new == labels and it > 0:
+            break
+        labels = new
+        for c in range(k):
+            members = [p for p, l in zip(points, labels) if l == c]
+            if members:
+                centroids[c] = [sum(x) / len(members) for x in zip(*members)]
+    return labels, centroids
+
+
+def bic(points: List[List[float]], labels: List[int],
+        centroids: List[List[float]]) -> float:
+    """Bayesian information criterion of a clustering assuming spherical
+    gaussians (Pelleg and Moore, X-means)."""
+    r = len(points)
+    k = len(centroids)
+    d = len(points[0])
+    if r <= k:
+        return -math.inf
+    sse = sum(_dist(p, centroids[l]) for p, l in zip(points, labels))
+    var = max(sse / (d * (r - k)), 1e-12)
+    loglik = 0.0
+    for c in range(k):
+        n = labels.count(c)
+        if n == 0:
+            continue
+        loglik += (n * math.log(n) - n * math.log(r)
+                   - n * d / 2 * math.log(2 * math.pi * var)
+                   - (n - 1) * d / 2)
+    params = (k - 1) + k * d + 1
+    return loglik - params / 2 * math.log(r)
+
+
+def cluster(bbvs: List[Dict[int, int]], max_k: int = 30, seeds: int = 5
+            ) -> List[Tuple[int, float]]:
+    """Cluster the intervals and return a list of (interval, weight) with
+    one representative interval per phase."""
+    if not bbvs:
+        raise ValueError("No intervals to cluster")
+    # The BIC needs more points than clusters.
+    if len(bbvs) < 2:
+        return [(0, 1.0)]
+    points = project(bbvs)
+    runs = {}
+    for k in range(1, min(max_k, len(points)) + 1):
+        best = None
+        for s in range(seeds):
+            labels, centroids = kmeans(points, k, seed=s)
+            score = bic(points, labels, centroids)
+            if best is None or score > best[0]:
+                best = (score, labels, centroids)
+        runs[k] = best
+
+    scores = [r[0] for r in runs.values() if r[0] != -math.inf]
+    lo, hi = min(scores), max(scores)
+    k = min(k for k, r in runs.items()
+            if r[0] >= lo + BIC_THRESHOLD * (hi - lo))
+    _, labels, centroids = runs[k]
+
+    simpoints = []
+    for c in range(k):
+        members = [i for i, l in enumerate(labels) if l == c]
+        if not members:
+            continue
+        rep = min(members, key=lambda i: _dist(points[i], centroids[c]))
+        simpoints.append((rep, len(members) / len(points)))
+    return sorted(simpoints)
+
+
+def write_simpoints(outdir, simpoints: List[Tuple[int, float]]) -> None:
+    """Write the `simpoints` and `weights` files in SimPoint tool format."""
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    with open(outdir / "simpoints", "w") as f:
+        for i, (interval, _) in enumerate(simpoints):
+            f.write(f"{interval} {i}\n")
+    with open(outdir / "weights", "w") as f:
+        for i, (_, weight) in enumerate(simpoints):
+            f.write(f"{weight} {i}\n")
+
+
+def load_simpoints(sp_dir, interval: int, warmup: int) -> List[SimPoint]:
+    """Read the `simpoints` and `weights` files and compute where the
+    checkpoint of every SimPoint has to be taken. The checkpoint is placed
+    `warmup` instructions before the SimPoint interval, clipped at the start
+    of the region of interest."""
+    sp_dir = Path(sp_dir)
+    intervals = {}
+    weights = {}
+    with open(sp_dir / "simpoints") as f:
+        for line in f:
+            iv, idx = line.split()
+            intervals[int(idx)] = int(iv)
+    with open(sp_dir / "weights") as f:
+        for line in f:
+            w, idx = line.split()
+            weights[int(idx)] = float(w)
+
+    simpoints = []
+    for idx in sorted(intervals):
+        begin = intervals[idx] * interval
+        start = max(begin - warmup, 0)
+        simpoints.append(
+            SimPoint(idx, intervals[idx], weights[idx], start, begin - start)
+        )
+    return simpoints
+
+
+def combine(simpoints: List[SimPoint], run_pattern: str,
+            core: str = "board.processor.cores1.core") -> Dict[str, float]:
+    """Combine the per SimPoint results into a whole run estimate.
+    `run_pattern` is the output directory of the eval runs with `{}` in place
+    of the SimPoint index. CPI is averaged with the SimPoint weights.
+    SimPoints without results or without instructions and cycles are
+    reported as missing, the weights of the others are renormalised."""
+    from .stats import load_stats
+
+    cpi = 0.0
+    total = 0.0
+    missing = []
+    for sp in simpoints:
+        try:
+            blocks = list(load_stats(run_pattern.format(sp.index)).blocks())
+        except FileNotFoundError:
+            blocks = []
+        if not blocks:
+            missing.append(sp.index)
+            continue
+        last = blocks[-1]
+        insts = last.get(f"{core}.commitStats0.numInsts",
+                         last.get(f"{core}.committedInsts", math.nan))
+        cycles = last.get(f"{core}.numCycles", math.nan)
+        if not insts > 0 or math.isnan(cycles):
+            missing.append(sp.index)
+            continue
+        cpi += sp.weight * cycles / insts
+        total += sp.weight
+
+    if total == 0:
+        raise ValueError("No SimPoint results found")
+    cpi /= total
+    return {"cpi": cpi, "ipc": 1 / cpi, "coverage": total, "missing": missing}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SimPoint utilities")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("cluster", help="Cluster a BBV file into SimPoints")
+    p.add_argument("bbv", type=str, help="simpoint.bb.gz of the profile run")
+    p.add_argument("-o", "--outdir", type=str, required=True,
+                   help="Directory for the simpoints and weights files")
+    p.add_argument("--max-k", type=int, default=30,
+                   help="Maximum number of clusters")
+
+    p = sub.add_parser("combine", help="Weighted whole run estimate")
+    p.add_argument("sp_dir", type=str, help="Directory with the simpoints")
+    p.add_argument("runs", type=str,
+                   help="Output directory of the eval runs, {} is replaced "
+                        "by the SimPoint index")
+    p.add_argument("--core", type=str, default="board.processor.cores1.core",
+                   help="Stats prefix of the measured core")
+
+    cli = parser.parse_args()
+    if cli.cmd == "cluster":
+        sps = cluster(read_bbv(cli.bbv), cli.max_k)
+        write_simpoints(cli.outdir, sps)
+        for interval, weight in sps:
+            print(f"Interval {interval:6d} weight {weight:.4f}")
+    else:
+        res = combine(load_simpoints(cli.sp_dir, 1, 0), cli.runs, cli.core)
+        print(f"IPC: {res['ipc']:.4f} CPI: {res['cpi']:.4f} "
+              f"(coverage {res['coverage']:.2%})")
+        if res["missing"]:
+            print("Missing SimPoints: ", res["missing"])
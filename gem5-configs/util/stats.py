@@ -0,0 +1,463 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Incremental reader for gem5 `stats.txt` files.
+
+Every `m5.stats.dump()` appends one "Begin/End Simulation Statistics" block
+to stats.txt. The reader remembers the byte offset of the last complete block,
+so a file that is still growing (a running simulation) can be polled and every
+block is parsed exactly once. Parsed blocks are appended to an `IntervalStore`
+which keeps one row per interval and one float64 column per stat.
+
+The store can be saved to a compact, zlib compressed columnar file. Columns
+that only hold integral values (most counters) are stored as int64, which
+compresses much better than their float64 form. Together with the stats.txt
+offset it remembers, re-ingesting a results directory only parses the blocks
+that were added since the last run.
+
+`load_stats()` reads the interval stats of a results directory independent of
+the format the run wrote them in (`stats.cols`, `stats.txt` or gem5's HDF5
+output `stats.h5`, the latter requires h5py).
+
+This module only depends on the python standard library so it can be used on
+the host without gem5.
+
+Usage
+-----
+
+```
+python3 -m util.stats <results>/stats.txt -o <results>/stats.cols
+python3 -m util.stats <results>/stats.txt -o <results>/stats.cols --follow
+python3 -m util.stats <results>/stats.h5 -o <results>/stats.cols
+```
+
+"""
+import argparse
+import csv
+import json
+import math
+import struct
+import sys
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+BEGIN_MARKER = b"---------- Begin Simulation Statistics ----------"
+END_MARKER = b"---------- End Simulation Statistics"
+
+STORE_MAGIC = b"G5IS"
+STORE_VERSION = 2
+
+# Integral values beyond this can not be represented exactly as float64
+# anyway, so such columns are kept as float64.
+_INT_LIMIT = 1 << 53
+
+
+def make_filter(include: Optional[Iterable[str]] = None,
+                exclude: Optional[Iterable[str]] = None
+                ) -> Optional[Callable[[str], bool]]:
+    """Build a predicate on stat names from lists of name prefixes.
+    A stat is kept if it matches any include prefix (or no include prefix
+    is given) and does not match any exclude prefix."""
+    include = tuple(include or ())
+    exclude = tuple(exclude or ())
+    if not include and not exclude:
+        return None
+
+    def keep(name: str) -> bool:
+        if include and not name.startswith(include):
+            return False
+        return not (exclude and name.startswith(exclude))
+
+    return keep
+
+
+def parse_line(line: bytes):
+    """Parse a single stat line into (name, value). Returns None for lines
+    that do not carry a numeric value."""
+    line = line.split(b"#", 1)[0]
+    tokens = line.split()
+    if len(tokens) < 2:
+        return None
+    try:
+        return tokens[0].decode(), float(tokens[1])
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_block(lines: Iterable[bytes],
+                keep: Optional[Callable[[str], bool]] = None
+                ) -> Dict[str, float]:
+    """Parse the lines of a single dump block into a stat -> value dict."""
+    block = {}
+    for line in lines:
+        stat = parse_line(line)
+        if stat is None:
+            continue
+        if keep is not None and not keep(stat[0]):
+            continue
+        block[stat[0]] = stat[1]
+    return block
+
+
+class StatsReader:
+    """Reads dump blocks from a (possibly still growing) stats.txt file.
+
+    The reader keeps the byte offset behind the last complete block. Each call
+    to `poll()` only reads what was appended since, and incomplete blocks at
+    the end of the file are left for the next call.
+    """
+
+    def __init__(self, path, offset: int = 0,
+                 keep: Optional[Callable[[str], bool]] = None):
+        self.path = Path(path)
+        self.offset = offset
+        self.keep = keep
+
+    def poll(self) -> List[Dict[str, float]]:
+        """Return all complete blocks appended since the last call."""
+        return list(self._blocks())
+
+    def _blocks(self) -> Iterator[Dict[str, float]]:
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            if self.path.stat().st_size < self.offset:
+                # The file was truncated or replaced. Start over.
+                self.offset = 0
+            f.seek(self.offset)
+            pos = self.offset
+            lines = None
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # The simulator is still writing this line.
+                    break
+                pos += len(line)
+                if line.startswith(BEGIN_MARKER):
+                    lines = []
+                elif line.startswith(END_MARKER):
+                    if lines is not None:
+                        block = parse_block(lines, self.keep)
+                        self.offset = pos
+                        yield block
+                    lines = None
+                elif lines is not None:
+                    lines.append(line)
+
+    def follow(self, interval: float = 5.0,
+               stop: Optional[Callable[[], bool]] = None
+               ) -> Iterator[Dict[str, float]]:
+        """Tail the stats file and yield blocks as they are written.
+        Runs until `stop()` returns true (forever if not given)."""
+        while True:
+            yield from self._blocks()
+            if stop is not None and stop():
+                yield from self._blocks()
+                return
+            time.sleep(interval)
+
+
+class IntervalStore:
+    """Columnar store for interval statistics.
+
+    Every appended dump block becomes one row, every stat one float64
+    column. Stats that are missing in a block are stored as NaN, so all
+    columns always have the same length.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, array] = {}
+        self.nrows = 0
+        self.meta: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return self.nrows
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def append(self, block: Dict[str, float]) -> None:
+        for name, value in block.items():
+            col = self.columns.get(name)
+            if col is None:
+                col = array("d", [math.nan]) * self.nrows
+                self.columns[name] = col
+            col.append(value)
+        self.nrows += 1
+        for col in self.columns.values():
+            if len(col) < self.nrows:
+                col.append(math.nan)
+
+    def extend(self, blocks: Iterable[Dict[str, float]]) -> None:
+        for block in blocks:
+            self.append(block)
+
+    def column(self, name: str) -> array:
+        return self.columns[name]
+
+    def get(self, name: str, default: float = math.nan) -> array:
+        """Like `column()` but returns a column filled with `default`
+        if the stat was never dumped."""
+        if name in self.columns:
+            return self.columns[name]
+        return array("d", [default]) * self.nrows
+
+    def row(self, index: int) -> Dict[str, float]:
+        return {name: col[index] for name, col in self.columns.items()}
+
+    def blocks(self) -> Iterator[Dict[str, float]]:
+        """The rows as dump blocks, i.e. without the stats that are missing
+        (NaN) in a row. This is what `StatsReader` returns for the same
+        stats."""
+        for i in range(self.nrows):
+            yield {name: col[i] for name, col in self.columns.items()
+                   if not math.isnan(col[i])}
+
+    def select(self, prefix: str) -> Dict[str, array]:
+        """All columns whose stat name starts with `prefix`."""
+        return {name: col for name, col in self.columns.items()
+                if name.startswith(prefix)}
+
+    def save(self, path) -> None:
+        """Write the store to `path`.
+
+        Layout: magic, version, header length, JSON header, followed by the
+        zlib compressed data of every column. The header records the type
+        (int64 "q" or float64 "d") and the compressed size of each column so
+        single columns can be loaded without decompressing the rest.
+        """
+        payload = []
+        names = []
+        types = []
+        sizes = []
+        for name, col in self.columns.items():
+            if _integral(col):
+                typecode = "q"
+                data = array("q", (int(v) for v in col)).tobytes()
+            else:
+                typecode = "d"
+                data = col.tobytes()
+            data = zlib.compress(data, 6)
+            names.append(name)
+            types.append(typecode)
+            sizes.append(len(data))
+            payload.append(data)
+        header = json.dumps({
+            "rows": self.nrows,
+            "columns": names,
+            "types": types,
+            "sizes": sizes,
+            "byteorder": _byteorder(),
+            "meta": self.meta,
+        }).encode()
+
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(STORE_MAGIC)
+            f.write(struct.pack("<II", STORE_VERSION, len(header)))
+            f.write(header)
+            for data in payload:
+                f.write(data)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path, keep: Optional[Callable[[str], bool]] = None
+             ) -> "IntervalStore":
+        """Read a store written by `save()`. If `keep` is given only the
+        matching columns are decompressed."""
+        store = cls()
+        with open(path, "rb") as f:
+            if f.read(4) != STORE_MAGIC:
+                raise ValueError(f"{path} is not an interval store")
+            version, hlen = struct.unpack("<II", f.read(8))
+            if version not in (1, STORE_VERSION):
+                raise ValueError(f"Unsupported store version: {version}")
+            header = json.loads(f.read(hlen))
+            swap = header["byteorder"] != _byteorder()
+            types = header.get("types", ["d"] * len(header["columns"]))
+            for name, typecode, size in zip(header["columns"], types,
+                                            header["sizes"]):
+                if keep is not None and not keep(name):
+                    f.seek(size, 1)
+                    continue
+                col = array(typecode)
+                col.frombytes(zlib.decompress(f.read(size)))
+                if swap:
+                    col.byteswap()
+                if typecode != "d":
+                    col = array("d", col)
+                store.columns[name] = col
+        store.nrows = header["rows"]
+        store.meta = header["meta"]
+        return store
+
+
+def _byteorder() -> str:
+    return sys.byteorder
+
+
+def _integral(col: array) -> bool:
+    """Whether the column can be stored as int64 without loss."""
+    return all(v.is_integer() and -_INT_LIMIT <= v <= _INT_LIMIT for v in col)
+
+
+def ingest(stats_file, store_file=None,
+           keep: Optional[Callable[[str], bool]] = None) -> IntervalStore:
+    """Parse `stats_file` into an interval store.
+
+    If `store_file` exists it is loaded first and only the blocks behind the
+    recorded stats.txt offset are parsed. The updated store is written back.
+    """
+    store = None
+    offset = 0
+    if store_file is not None and Path(store_file).exists():
+        store = IntervalStore.load(store_file)
+        if store.meta.get("source") == str(Path(stats_file).resolve()):
+            offset = store.meta.get("offset", 0)
+        else:
+            store = None
+    if store is None:
+        store = IntervalStore()
+
+    reader = StatsReader(stats_file, offset=offset, keep=keep)
+    store.extend(reader.poll())
+    store.meta["source"] = str(Path(stats_file).resolve())
+    store.meta["offset"] = reader.offset
+
+    if store_file is not None:
+        store.save(store_file)
+    return store
+
+
+def read_hdf5(path, keep: Optional[Callable[[str], bool]] = None
+              ) -> IntervalStore:
+    """Read gem5's HDF5 stats output (`--stats-file=h5://stats.h5`) into an
+    interval store. Every dataset holds one row per dump. Vector stats
+    become one column per element, named like in stats.txt (`name::i`)."""
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("Reading HDF5 stats requires h5py "
+                          "(pip install h5py)") from None
+
+    store = IntervalStore()
+    with h5py.File(path, "r") as f:
+        def visit(name, obj):
+            if not isinstance(obj, h5py.Dataset) or obj.ndim == 0:
+                return
+            name = name.replace("/", ".")
+            data = obj[()].reshape(obj.shape[0], -1)
+            for i in range(data.shape[1]):
+                col = name if data.shape[1] == 1 else f"{name}::{i}"
+                if keep is None or keep(col):
+                    store.columns[col] = array("d", data[:, i].astype(float))
+                    store.nrows = max(store.nrows, data.shape[0])
+        f.visititems(visit)
+    for col in store.columns.values():
+        col.extend([math.nan] * (store.nrows - len(col)))
+    store.meta["source"] = str(Path(path).resolve())
+    return store
+
+
+def load_stats(run_dir, keep: Optional[Callable[[str], bool]] = None
+               ) -> IntervalStore:
+    """Interval stats of a results directory. Uses the columnar store if
+    the run wrote one and falls back to stats.txt and stats.h5."""
+    run_dir = Path(run_dir)
+    cols = run_dir / "stats.cols"
+    text = run_dir / "stats.txt"
+    if cols.exists():
+        if not text.exists():
+            return IntervalStore.load(cols, keep)
+        # The run is still going or kept its stats.txt. Pick up the
+        # blocks dumped since the store was written.
+        store = IntervalStore.load(cols, keep)
+        if store.meta.get("source") == str(text.resolve()):
+            store.extend(StatsReader(text, store.meta.get("offset", 0),
+                                     keep).poll())
+            return store
+    if text.exists():
+        return ingest(text, keep=keep)
+    if (run_dir / "stats.h5").exists():
+        return read_hdf5(run_dir / "stats.h5", keep)
+    raise FileNotFoundError(f"No stats in {run_dir}")
+
+
+def load_roi(run_dir, keep: Optional[Callable[[str], bool]] = None
+             ) -> List[Dict[str, float]]:
+    """The dumps of a `--roi` run that cover request batches, as recorded
+    in its roi.csv."""
+    run_dir = Path(run_dir)
+    with open(run_dir / "roi.csv") as f:
+        kinds = {int(row["dump"]): row["kind"] for row in csv.DictReader(f)}
+    return [block for i, block in enumerate(load_stats(run_dir, keep).blocks())
+            if kinds.get(i) == "roi"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a gem5 stats.txt into a columnar interval store"
+    )
+    parser.add_argument("stats", type=str, help="Path to stats.txt")
+    parser.add_argument(
+        "-o", "--output", type=str, default=None,
+        help="Store file. Defaults to <stats>.cols next to the stats file.",
+    )
+    parser.add_argument(
+        "--include", type=str, nargs="*", default=None,
+        help="Only keep stats starting with one of these prefixes.",
+    )
+    parser.add_argument(
+        "--exclude", type=str, nargs="*", default=None,
+        help="Drop stats starting with one of these prefixes.",
+    )
+    parser.add_argument(
+        "--follow", action="store_true", default=False,
+        help="Keep tailing the stats file and update the store on every dump.",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=5.0,
+        help="Polling interval in seconds when following.",
+    )
+    cli = parser.parse_args()
+
+    output = cli.output or str(Path(cli.stats).with_suffix(".cols"))
+    keep = make_filter(cli.include, cli.exclude)
+    if cli.stats.endswith(".h5"):
+        store = read_hdf5(cli.stats, keep)
+        store.save(output)
+        print(f"{output}: {len(store)} intervals, {len(store.columns)} stats")
+        sys.exit(0)
+    store = ingest(cli.stats, output, keep)
+    print(f"{output}: {len(store)} intervals, {len(store.columns)} stats")
+
+    if cli.follow:
+        reader = StatsReader(cli.stats, offset=store.meta["offset"], keep=keep)
+        for block in reader.follow(cli.interval):
+            store.append(block)
+            store.meta["offset"] = reader.offset
+            store.save(output)
+            print(f"{output}: {len(store)} intervals")
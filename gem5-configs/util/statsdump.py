@@ -0,0 +1,179 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Selective stats dumping.
+
+By default every dump writes the stats of the whole system. The `StatsDumper`
+restricts a dump to the SimObject subtrees given in an allowlist and leaves
+out the subtrees of a denylist. Both lists take SimObjects, their paths
+(e.g. `board.processor.cores1`) or functions returning either, which are
+called at the first dump for objects created later. gem5 can only dump complete subtrees, so to
+leave out a denied object its parents are replaced by their remaining
+children. The own stats of these parents (and the global stats like
+`simSeconds` if anything is filtered) are not written.
+
+The dumper also writes the stats in the format chosen with `--stats-format`:
+
+- `text`: gem5's stats.txt only.
+- `columnar`: after every dump the new block is added to a compressed
+  columnar `stats.cols` (see `util.stats`). At exit the store is written a
+  last time and stats.txt is removed unless `--keep-stats-txt` is given.
+- `hdf5`: gem5's own HDF5 output `stats.h5` in addition to stats.txt, which
+  is removed at exit like for `columnar`. Needs gem5 built with HDF5.
+"""
+import atexit
+from pathlib import Path
+from typing import Dict, List
+
+import m5
+from m5.objects import Root, SimObject
+
+from .stats import IntervalStore, StatsReader
+
+
+STATS_FORMATS = ["text", "columnar", "hdf5"]
+
+
+def _path(obj) -> str:
+    if isinstance(obj, str):
+        return obj
+    if isinstance(obj, SimObject):
+        return obj.path()
+    return _path(obj())
+
+
+def _matches(path: str, prefixes: List[str]) -> bool:
+    return any(path == p or path.startswith(p + ".") for p in prefixes)
+
+
+def select_roots(include: List[str], exclude: List[str]) -> List:
+    """SimObjects whose subtrees together contain exactly the included and
+    not excluded objects."""
+    root = Root.getInstance()
+    objs = {obj.path(): obj for obj in root.descendants()}
+    children: Dict[str, List[str]] = {}
+    for path in objs:
+        if path == "root":
+            continue
+        parent = path.rpartition(".")[0] or "root"
+        children.setdefault(parent, []).append(path)
+
+    def cover(path: str) -> List[str]:
+        if _matches(path, exclude):
+            return []
+        below = [e for e in exclude if path == "root" or e.startswith(path + ".")]
+        if not below:
+            return [path]
+        return [c for child in children.get(path, []) for c in cover(child)]
+
+    starts = []
+    for path in include or ["root"]:
+        if path not in objs:
+            print("Stats filter: unknown SimObject ", path)
+            continue
+        starts.append(path)
+
+    return [objs[path] for start in starts for path in cover(start)]
+
+
+class StatsDumper:
+    """Drop-in for `m5.stats.dump()` that applies the stats filter,
+    reports the number of bytes every dump added to the stats file and
+    writes the stats in the chosen output format."""
+
+    # Rewrite the columnar store every that many dumps. It is always
+    # written at exit, this only limits what is lost if gem5 crashes.
+    SAVE_EVERY = 16
+
+    def __init__(self, include: List = None, exclude: List = None,
+                 fmt: str = "text", keep_text: bool = False):
+        self.include = include or []
+        self.exclude = exclude or []
+        self.roots = None
+        self.fmt = fmt
+        self.keep_text = keep_text
+        self.stats_file = Path(m5.options.outdir) / m5.options.stats_file
+        self.store = None
+        self.reader = None
+        if fmt == "columnar":
+            self.store_file = self.stats_file.with_suffix(".cols")
+            self.store = IntervalStore()
+            self.reader = StatsReader(self.stats_file)
+        elif fmt == "hdf5":
+            # Must be registered before the simulation is instantiated.
+            m5.stats.addStatVisitor("h5://stats.h5")
+        elif fmt != "text":
+            raise ValueError(f"Unknown stats format: {fmt}")
+        if fmt != "text":
+            atexit.register(self.close)
+
+    def enabled(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    def dump(self) -> None:
+        if not self.enabled():
+            self._dump(None)
+            return
+        if self.roots is None:
+            self.roots = select_roots(
+                [_path(o) for o in self.include],
+                [_path(o) for o in self.exclude],
+            )
+            print("Stats filter: dumping ",
+                  ", ".join(r.path() for r in self.roots))
+        self._dump(self.roots)
+
+    def _dump(self, roots) -> None:
+        before = self._size()
+        if roots is None:
+            m5.stats.dump()
+        else:
+            m5.stats.dump(roots=roots)
+        print("Stats dump: ", self._size() - before, " bytes")
+        if self.store is not None:
+            self._collect()
+            if len(self.store) % self.SAVE_EVERY == 0:
+                self._save()
+
+    def _collect(self) -> None:
+        self.store.extend(self.reader.poll())
+        self.store.meta["source"] = str(self.stats_file.resolve())
+        self.store.meta["offset"] = self.reader.offset
+
+    def _save(self) -> None:
+        self.store.save(self.store_file)
+
+    def close(self) -> None:
+        """Write the columnar store and drop the text stats."""
+        if self.store is not None:
+            self._collect()
+            self._save()
+            print("Stats: ", len(self.store), " intervals written to ",
+                  self.store_file)
+        if not self.keep_text and self.stats_file.exists():
+            self.stats_file.unlink()
+
+    def _size(self) -> int:
+        try:
+            return self.stats_file.stat().st_size
+        except OSError:
+            return 0
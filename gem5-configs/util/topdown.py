@@ -0,0 +1,173 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Top-down breakdown of the issue slots of the measured O3 core.
+
+The slots are `width` x cycles at rename, the boundary between the
+frontend and the backend. Every slot is attributed to one of:
+
+- `retiring`: slots of committed ops.
+- `bad_spec`: slots of ops that were renamed but squashed, and the slots
+  lost while rename recovered from a squash.
+- `backend`: slots lost while rename was blocked by a full ROB, IQ, LSQ or
+  register file, or by a serializing instruction.
+- `frontend`: the remaining slots, in which the frontend did not deliver.
+
+The frontend share is split further by the stall cycles of fetch: L1I misses
+(`fe_icache`), ITLB misses (`fe_itlb`), fetch waiting for a fetch target
+while the FTQ is empty (`fe_ftq`, decoupled frontend only) and redirects
+after branches the BTB missed, estimated as the branches decode corrected
+times `BTB_PENALTY` cycles (`fe_btb`). If these add up to more than the
+frontend share they are scaled down to it, what they do not explain is
+`fe_other`.
+
+The breakdown is computed per stats dump and for the whole run. The width is
+read from the `config.ini` of the run. With `--diff` the change of every
+share relative to the first run is printed, e.g. to see whether a frontend
+change moved the bottleneck.
+
+Usage
+-----
+
+```
+python3 -m util.topdown <results-dir> [<results-dir> ...] [--intervals]
+python3 -m util.topdown <baseline-dir> <fdp-dir> --diff
+```
+
+"""
+import argparse
+import configparser
+import math
+from pathlib import Path
+from typing import Dict, Optional
+
+from .metrics import accumulate, cycles, measured_core, value
+from .stats import load_stats, make_filter
+
+
+DEFAULT_WIDTH = 8
+# Cycles between fetching a branch the BTB missed and fetching its target
+# after decode redirected fetch.
+BTB_PENALTY = 3
+
+LEVEL1 = ["retiring", "bad_spec", "backend", "frontend"]
+FRONTEND = ["fe_icache", "fe_itlb", "fe_ftq", "fe_btb", "fe_other"]
+COLUMNS = LEVEL1 + FRONTEND
+
+_KEEP = make_filter(include=["board.processor."])
+
+
+def _sum(block: Dict[str, float], *names: str) -> float:
+    return sum(value(block, name, default=0.0) for name in names)
+
+
+def topdown(block: Dict[str, float], core: Optional[str] = None,
+            width: int = DEFAULT_WIDTH) -> Dict[str, float]:
+    """Fractions of the issue slots of one block. NaN without cycles."""
+    core = core or measured_core(block)
+    slots = width * cycles(block, core)
+    if not slots or math.isnan(slots):
+        return {c: math.nan for c in COLUMNS}
+
+    committed = value(block, f"{core}.commitStats0.numOps",
+                      f"{core}.commit.committedOps",
+                      f"{core}.committedOps", default=0.0)
+    renamed = value(block, f"{core}.rename.renamedInsts", default=committed)
+    recovery = value(block, f"{core}.rename.squashCycles", default=0.0)
+    blocked = _sum(block, f"{core}.rename.blockCycles",
+                   f"{core}.rename.serializeStallCycles")
+
+    result = {
+        "retiring": committed / slots,
+        "bad_spec": (max(renamed - committed, 0.0)
+                     + width * recovery) / slots,
+        "backend": width * blocked / slots,
+    }
+    result["frontend"] = max(1.0 - sum(result.values()), 0.0)
+
+    # Fetch stalls are whole cycles without new instructions.
+    parts = {
+        "fe_icache": _sum(block, f"{core}.fetch.icacheStallCycles",
+                          f"{core}.fetch.icacheWaitRetryStallCycles"),
+        "fe_itlb": _sum(block, f"{core}.fetch.tlbCycles"),
+        "fe_ftq": _sum(block, f"{core}.fetch.ftqStallCycles"),
+        "fe_btb": BTB_PENALTY * _sum(block, f"{core}.decode.branchMispred"),
+    }
+    parts = {k: width * v / slots for k, v in parts.items()}
+    explained = sum(parts.values())
+    scale = (min(result["frontend"] / explained, 1.0) if explained
+             else 0.0)
+    for k, v in parts.items():
+        result[k] = v * scale
+    result["fe_other"] = result["frontend"] - explained * scale
+    return result
+
+
+def core_width(run_dir, core: str) -> int:
+    """Rename width of a core from the config.ini of a run."""
+    config = configparser.ConfigParser(strict=False, interpolation=None)
+    config.read(Path(run_dir) / "config.ini")
+    if not config.has_option(core, "renameWidth"):
+        return DEFAULT_WIDTH
+    return config.getint(core, "renameWidth")
+
+
+def run_topdown(run_dir, intervals: bool = False) -> Dict:
+    """Breakdown of a whole run and, with `intervals`, of every dump."""
+    blocks = list(load_stats(run_dir, _KEEP).blocks())
+    total = accumulate(blocks)
+    core = measured_core(total)
+    width = core_width(run_dir, core)
+    result = {"width": width, "total": topdown(total, core, width)}
+    if intervals:
+        result["intervals"] = [topdown(b, core, width) for b in blocks]
+    return result
+
+
+def _row(label: str, values: Dict[str, float]) -> str:
+    return f"{label:<32} " + " ".join(f"{values[c]:>9.3f}" for c in COLUMNS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Top-down slot breakdown of the measured core"
+    )
+    parser.add_argument("runs", type=str, nargs="+",
+                        help="Results directories")
+    parser.add_argument("--intervals", action="store_true", default=False,
+                        help="Also print the breakdown of every interval.")
+    parser.add_argument("--diff", action="store_true", default=False,
+                        help="Print the change relative to the first run.")
+    cli = parser.parse_args()
+
+    print(f"{'run':<32} " + " ".join(f"{c:>9}" for c in COLUMNS))
+    totals = []
+    for run in cli.runs:
+        result = run_topdown(run, cli.intervals)
+        for i, values in enumerate(result.get("intervals", [])):
+            print(_row(f"  {i}", values))
+        print(_row(Path(run).name, result["total"]))
+        totals.append(result["total"])
+    if cli.diff:
+        for run, total in zip(cli.runs[1:], totals[1:]):
+            print(_row(f"{Path(run).name} - {Path(cli.runs[0]).name}",
+                       {c: total[c] - totals[0][c] for c in COLUMNS}))
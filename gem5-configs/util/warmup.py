@@ -0,0 +1,108 @@
+# Copyright (c) 2025 Technical University of Munich
+# All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare a cold eval run (no warmup) with a warmed up run.
+
+For every interval the IPC, L1I MPKI and branch MPKI of both runs are
+printed together with their relative difference. The first interval from
+which on all differences stay below the threshold is the point where the
+cold run caught up, which tells how much warmup is needed. The branch
+MPKI only shows the warmup of the predictors if the warm run also had a
+detailed warmup (`--detailed-warmup-insts`), the warmup core has its own
+branch predictor.
+
+Usage
+-----
+
+```
+python3 -m util.warmup <cold-results-dir> <warm-results-dir> [--threshold 0.02]
+```
+
+"""
+import argparse
+import math
+from typing import Dict, List, Optional
+
+from .metrics import interval_metrics
+from .stats import load_stats
+
+
+METRICS = ["ipc", "l1i_mpki", "branch_mpki"]
+
+
+def read_intervals(run_dir) -> List[Dict[str, float]]:
+    return [interval_metrics(b) for b in load_stats(run_dir).blocks()]
+
+
+def relative(cold: float, warm: float) -> float:
+    if warm == 0 or math.isnan(warm) or math.isnan(cold):
+        return 0.0 if cold == warm else math.nan
+    return (cold - warm) / warm
+
+
+def compare(cold: List[Dict[str, float]], warm: List[Dict[str, float]]
+            ) -> List[Dict[str, float]]:
+    """Relative difference cold vs. warm of every metric per interval."""
+    return [{m: relative(c[m], w[m]) for m in METRICS}
+            for c, w in zip(cold, warm)]
+
+
+def converged_at(deltas: List[Dict[str, float]], threshold: float
+                 ) -> Optional[int]:
+    """First interval from which on all deltas are below the threshold."""
+    first = None
+    for i, d in enumerate(deltas):
+        if all(abs(d[m]) <= threshold for m in METRICS if not math.isnan(d[m])):
+            if first is None:
+                first = i
+        else:
+            first = None
+    return first
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare a cold and a warmed up eval run"
+    )
+    parser.add_argument("cold", type=str, help="Results dir of the cold run")
+    parser.add_argument("warm", type=str, help="Results dir of the warm run")
+    parser.add_argument("--threshold", type=float, default=0.02,
+                        help="Relative difference considered as converged")
+    cli = parser.parse_args()
+
+    cold = read_intervals(cli.cold)
+    warm = read_intervals(cli.warm)
+    deltas = compare(cold, warm)
+
+    print(f"{'interval':>8} " + " ".join(
+        f"{m + ' cold':>16} {m + ' warm':>16} {'delta':>8}" for m in METRICS))
+    for i, (c, w, d) in enumerate(zip(cold, warm, deltas)):
+        print(f"{i:8d} " + " ".join(
+            f"{c[m]:16.4f} {w[m]:16.4f} {d[m]:+8.2%}" for m in METRICS))
+
+    first = converged_at(deltas, cli.threshold)
+    if first is None:
+        print(f"The cold run did not converge within {len(deltas)} intervals.")
+    else:
+        insts = sum(c["insts"] for c in cold[:first])
+        print(f"The cold run is within {cli.threshold:.1%} of the warm run "
+              f"from interval {first} on ({insts:.0f} instructions).")
@@ -30,11 +30,24 @@ def writeRunScript(cfg, cpu=1):
     dcfile = cfg["dcfile"]
     container = cfg["container"]
     test_ip = "0.0.0.0"
-    conc = 2
+    conc = cfg.get("concurrency") or 2
     # home = "root"
     home = "home/gem5"
-    n_invocations=cfg["invocations"]
-    n_warming=cfg["warming"]
+    n_invocations = cfg["invocations"]
+    n_warming = cfg["warming"]
+    if n_invocations % conc or n_warming % conc:
+        raise ValueError(f"The number of invocations ({n_invocations}) and "
+                         f"warming requests ({n_warming}) must be multiples "
+                         f"of the concurrency ({conc})")
+    # Mark every batch of `m5iv` requests as work item
+    m5iv = f" -m5iv {cfg['m5iv']}" if cfg.get("m5iv") else ""
+    # Open loop load with a fixed request rate
+    rate = f" -rate {cfg['rate']}" if cfg.get("rate") else ""
+    # Record the request latencies. The client copies the histogram to the
+    # host itself while measuring.
+    hist = " -hist /tmp/latency.hist" if cfg.get("latency_hist") else ""
+    # Keep the client off the server cores
+    taskset = f"taskset -c {cfg['client_cpus']} " if cfg.get("client_cpus") else ""
     return f"""
 #!/bin/bash
 
@@ -60,7 +73,7 @@ m5 exit ## 3: Pinned container
 # # The client will perform some functional warming
 # and then send a fail code before invoking the
 # function again for the actual measurement.
-sudo GOGC=1000 /{home}/http-client -f /{home}/{urlfile} -url {test_ip} -c {conc} -n {n_invocations} -w {n_warming} -m5ops -v
+sudo GOGC=1000 {taskset}/{home}/http-client -f /{home}/{urlfile} -url {test_ip} -c {conc} -n {n_invocations} -w {n_warming} -m5ops{m5iv}{rate}{hist} -v
 
 
 m5 exit ## 4: Stop client
@@ -37,11 +37,13 @@ Usage
 ```
 scons build/<ALL|X86>/gem5.opt -j<NUM_CPUS>
 ./build/<ALL|X86>/gem5.opt x86-simple.py
-    --mode <setup/eval> --function <function-name>
+    --mode <setup/eval> --workload <function-name>
     --kernel <path-to-vmlinux> --disk <path-to-disk-image>
-    --atomic-warming <num-inv-to-warm> --num-invocations <num-inv-to-simulate>
 ```
 
+Stats per invocation (`--roi`, `--num-invocations`) are only supported by
+`fs-fdp.py`.
+
 """
 import m5
 
@@ -109,24 +111,6 @@ board = X86Board(
 
 
 
-def workitems(start) -> bool:
-    cnt = 1
-    while True:
-        if start:
-            print("Begin Invocation ", cnt)
-        else:
-            print("End Invocation ", cnt)
-            if args.mode == "eval":
-                m5.stats.dump()
-                m5.stats.reset()
-
-            cnt += 1
-
-        if args.mode == "eval" and cnt >= args.num_invocations:
-            yield True
-        yield False
-
-
 def executeExit() -> bool:
 
     if args.mode == "setup":
@@ -206,9 +190,6 @@ class MySimulator(Simulator):
 simulator = MySimulator(
     board=board,
     on_exit_event={
-        # ExitEvent.EXIT: (func() for func in [processor.switch]),
-        # ExitEvent.WORKBEGIN: workitems(True),
-        # ExitEvent.WORKEND: workitems(False),
         ExitEvent.EXIT: executeExit(),
         ExitEvent.FAIL: executeFail(),
         ExitEvent.MAX_INSTS: maxInsts(),
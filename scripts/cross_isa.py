@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+# MIT License
+#
+# Copyright (c) 2025 Technical University of Munich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Cross-ISA comparison.
+
+Runs the same workloads and configuration on every ISA `fs-fdp.py` has a
+board for (and a kernel and disk image in `wkdir/<arch>/`), with and without
+FDP. Instruction counts differ between ISAs, so the runs are compared per
+request: the client marks batches of `--roi-interval` requests with
+workbegin/workend and the eval runs dump the stats per batch (`--roi`).
+Reported per workload, ISA and FDP setting:
+
+- instructions and cycles per request, IPC, L1I and branch MPKI,
+- the fraction of cycles fetch stalled on the L1I,
+- accuracy and coverage of the L1I prefetcher and, for FDP runs, the
+  speedup over the run without FDP (cycles per request),
+- instructions and cycles per request relative to the baseline ISA.
+
+The table is written to `results/cross-isa/<experiment>/cross-isa.csv`.
+
+Usage
+-----
+
+```
+python3 scripts/cross_isa.py -e cross -w nodeapp mediawiki
+python3 scripts/cross_isa.py -e cross -w nodeapp --isa X86 Arm --fdp on \\
+    -p ipf=fdp+tagged --report
+```
+
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+
+from sweep import (DEFAULT_MEM_PER_JOB, ISA_TO_ARCH, ROOT, default_sweep,
+                   expand, parse_value, run_jobs)
+
+from util.metrics import (accumulate, branch_mpki, cycles, icache_stall,
+                          insts, ipc, l1i_mpki, measured_core, prefetch)
+from util.stats import load_roi
+
+
+# ISAs fs-fdp.py builds a board for.
+BOARD_ISAS = ["X86", "Arm"]
+
+COLUMNS = ["workload", "isa", "fdp", "requests", "insts_per_req",
+           "cycles_per_req", "ipc", "l1i_mpki", "branch_mpki",
+           "icache_stall", "pf_accuracy", "pf_coverage", "fdp_speedup",
+           "rel_insts_per_req", "rel_cycles_per_req"]
+
+
+def available_isas() -> list:
+    return [isa for isa in BOARD_ISAS
+            if (ROOT / "wkdir" / ISA_TO_ARCH[isa] / "kernel").exists()
+            and (ROOT / "wkdir" / ISA_TO_ARCH[isa] / "disk.img").exists()]
+
+
+def job_metrics(job, roi_interval: int) -> dict:
+    """Metrics of the request batches of a finished job. NaN if it has no
+    stats."""
+    try:
+        batches = load_roi(job.outdir)
+    except FileNotFoundError:
+        batches = []
+    if not batches:
+        return {c: math.nan for c in COLUMNS[3:]}
+    total = accumulate(batches)
+    core = measured_core(total)
+    requests = len(batches) * roi_interval
+    pf = prefetch(total, core)
+    return {
+        "requests": requests,
+        "insts_per_req": insts(total, core) / requests,
+        "cycles_per_req": cycles(total, core) / requests,
+        "ipc": ipc(total, core),
+        "l1i_mpki": l1i_mpki(total, core),
+        "branch_mpki": branch_mpki(total, core),
+        "icache_stall": icache_stall(total, core),
+        "pf_accuracy": pf["pf_accuracy"],
+        "pf_coverage": pf["pf_coverage"],
+    }
+
+
+def normalise(rows: list, baseline: str) -> None:
+    """Add the FDP speedup and the values relative to the baseline ISA."""
+    index = {(r["workload"], r["isa"], r["fdp"]): r for r in rows}
+    for row in rows:
+        nofdp = index.get((row["workload"], row["isa"], False))
+        row["fdp_speedup"] = (
+            nofdp["cycles_per_req"] / row["cycles_per_req"]
+            if row["fdp"] and nofdp else math.nan
+        )
+        base = index.get((row["workload"], baseline, row["fdp"]))
+        for key in ["insts_per_req", "cycles_per_req"]:
+            row[f"rel_{key}"] = (row[key] / base[key] if base
+                                 else math.nan)
+
+
+def _fmt(v) -> str:
+    if isinstance(v, float):
+        return f"{v:.4f}" if abs(v) < 1000 or math.isnan(v) else f"{v:.0f}"
+    return str(v)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run and compare workloads across ISAs"
+    )
+    parser.add_argument("-e", "--experiment", type=str, required=True,
+                        help="Name of the experiment.")
+    parser.add_argument("-w", "--workloads", type=str, nargs="+",
+                        required=True, help="Workloads to run.")
+    parser.add_argument("--isa", type=str, nargs="+", default=None,
+                        choices=BOARD_ISAS,
+                        help="ISAs to compare. Defaults to all ISAs with a "
+                             "kernel and disk image in wkdir. The first one "
+                             "is the baseline.")
+    parser.add_argument("--fdp", type=str, default="both",
+                        choices=["on", "off", "both"],
+                        help="Run with FDP, without or both.")
+    parser.add_argument("--roi-interval", type=int, default=10,
+                        help="Requests per measured batch.")
+    parser.add_argument("--num-invocations", type=int, default=10,
+                        help="Number of batches to measure.")
+    parser.add_argument("-p", "--param", type=str, action="append",
+                        default=[],
+                        help="Further fs-fdp.py parameter of the eval jobs, "
+                             "given as <name>=<value>. Can be repeated.")
+    parser.add_argument("--gem5", type=str, default=None,
+                        help="Path to the gem5 binary.")
+    parser.add_argument("--mem-per-job", type=str,
+                        default=DEFAULT_MEM_PER_JOB,
+                        help="Host memory reserved per job.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Maximum number of parallel jobs.")
+    parser.add_argument("--report", action="store_true", default=False,
+                        help="Do not run, only report existing results.")
+    parser.add_argument("--dry-run", action="store_true", default=False,
+                        help="Only print the jobs.")
+    cli = parser.parse_args()
+
+    isas = cli.isa or available_isas()
+    if not isas:
+        sys.exit("No ISA with a kernel and disk image in wkdir")
+
+    params = {}
+    for param in cli.param:
+        key, _, value = param.partition("=")
+        params[key] = parse_value(value)
+
+    base = default_sweep() | {
+        "workloads": cli.workloads,
+        "isa": isas,
+        "mem_per_job": cli.mem_per_job,
+        "params": {"roi-interval": [cli.roi_interval]},
+    }
+    if cli.gem5:
+        base["gem5"] = cli.gem5
+    setup = expand(base | {"experiment": f"setup-{cli.experiment}",
+                           "mode": "setup"})
+    jobs = expand(base | {
+        "experiment": cli.experiment,
+        "fdp": {"on": [True], "off": [False], "both": [False, True]}[cli.fdp],
+        "points": [params | {"roi": True,
+                             "num-invocations": cli.num_invocations}],
+    })
+
+    if cli.dry_run:
+        for job in setup + jobs:
+            print(f"{job.name}: {' '.join(job.cmd)}")
+        sys.exit(0)
+
+    if not cli.report:
+        if not run_jobs(setup, cli.jobs):
+            sys.exit("Taking the checkpoints failed")
+        run_jobs(jobs, cli.jobs)
+
+    rows = [{"workload": job.workload, "isa": job.isa, "fdp": job.fdp}
+            | job_metrics(job, cli.roi_interval) for job in jobs]
+    normalise(rows, isas[0])
+
+    print(" ".join(f"{c:>12}" for c in COLUMNS))
+    for row in rows:
+        print(" ".join(f"{_fmt(row[c]):>12}" for c in COLUMNS))
+
+    out = ROOT / base["results"] / "cross-isa" / cli.experiment
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / "cross-isa.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(out / "cross-isa.json", "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Written to {out / 'cross-isa.csv'}")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+# MIT License
+#
+# Copyright (c) 2025 Technical University of Munich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Design space exploration over the core parameters of `fs-fdp.py`.
+
+The design space assigns every parameter (any option of `fs-fdp.py`, e.g.
+`rob-entries` or `ftq-entries`) a list of values. Values can be given as a
+list, as a `min:max:step` range or as `min:max:pow2` for all powers of two
+in the range. From the space a set of design points is drawn:
+
+- `grid`: all combinations.
+- `random`: `-n` distinct combinations drawn uniformly.
+- `lhs`: a Latin hypercube sample of `-n` points. The value list of every
+  parameter is split into `n` strata and every stratum is used exactly once,
+  which covers each parameter evenly with few points.
+
+The points are written as a sweep spec (`points`) that is run with
+`scripts/sweep.py --spec`. All other sweep settings (workloads, fdp, ...)
+can be taken from a base spec given with `--base`.
+
+Usage
+-----
+
+```
+python3 scripts/dse.py -e rob-iq --method lhs -n 20 \\
+    -d rob-entries=128:640:64 -d iq-entries=64:512:pow2 -o rob-iq.json
+python3 scripts/sweep.py --spec rob-iq.json
+```
+
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+
+
+def parse_values(text: str) -> list:
+    """Value list of a parameter: `a,b,c`, `min:max:step` or
+    `min:max:pow2`."""
+    if ":" not in text:
+        return [_number(v) for v in text.split(",")]
+    lo, hi, step = text.split(":")
+    lo, hi = int(lo), int(hi)
+    if step == "pow2":
+        values = []
+        v = 1
+        while v <= hi:
+            if v >= lo:
+                values.append(v)
+            v *= 2
+        return values
+    return list(range(lo, hi + 1, int(step)))
+
+
+def _number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def grid(space: dict) -> list:
+    names = list(space)
+    return [dict(zip(names, values))
+            for values in itertools.product(*space.values())]
+
+
+def random_points(space: dict, n: int, rng: random.Random) -> list:
+    """Up to `n` distinct uniformly drawn points."""
+    total = 1
+    for values in space.values():
+        total *= len(values)
+    n = min(n, total)
+    seen = set()
+    points = []
+    while len(points) < n:
+        point = tuple(rng.choice(values) for values in space.values())
+        if point in seen:
+            continue
+        seen.add(point)
+        points.append(dict(zip(space, point)))
+    return points
+
+
+def lhs(space: dict, n: int, rng: random.Random) -> list:
+    """Latin hypercube sample with `n` points. For every parameter the
+    unit interval is split into `n` strata, a random position is drawn in
+    each of them and mapped onto the value list. The strata are assigned
+    to the points by an independent random permutation per parameter."""
+    columns = {}
+    for name, values in space.items():
+        strata = list(range(n))
+        rng.shuffle(strata)
+        columns[name] = [
+            values[min(int((s + rng.random()) / n * len(values)),
+                       len(values) - 1)]
+            for s in strata
+        ]
+    points = [{name: columns[name][i] for name in space} for i in range(n)]
+    # Small value lists can produce duplicates. Simulate them only once.
+    unique = []
+    for point in points:
+        if point not in unique:
+            unique.append(point)
+    return unique
+
+
+METHODS = ["grid", "random", "lhs"]
+
+
+def sample(space: dict, method: str, n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    if method == "grid":
+        return grid(space)
+    if method == "random":
+        return random_points(space, n, rng)
+    if method == "lhs":
+        return lhs(space, n, rng)
+    raise ValueError(f"Unknown method: {method}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a design space sweep over core parameters"
+    )
+    parser.add_argument("-e", "--experiment", type=str, required=True,
+                        help="Name of the experiment.")
+    parser.add_argument("-d", "--dim", type=str, action="append", default=[],
+                        help="Parameter and its values: <name>=<a>,<b>,... "
+                             "or <name>=<min>:<max>:<step|pow2>. "
+                             "Can be repeated.")
+    parser.add_argument("--space", type=str, default=None,
+                        help="JSON file mapping parameters to value lists "
+                             "or range strings.")
+    parser.add_argument("--method", type=str, default="grid", choices=METHODS,
+                        help="How the design points are drawn.")
+    parser.add_argument("-n", "--samples", type=int, default=16,
+                        help="Number of points for random and lhs.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the random number generator.")
+    parser.add_argument("--base", type=str, default=None,
+                        help="Sweep spec the points are added to.")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="Output sweep spec. Printed if not given.")
+    cli = parser.parse_args()
+
+    space = {}
+    if cli.space:
+        with open(cli.space) as f:
+            for name, values in json.load(f).items():
+                space[name] = (values if isinstance(values, list)
+                               else parse_values(str(values)))
+    for dim in cli.dim:
+        name, _, values = dim.partition("=")
+        space[name] = parse_values(values)
+    if not space:
+        raise SystemExit("The design space is empty, use --dim or --space")
+
+    spec = {}
+    if cli.base:
+        with open(cli.base) as f:
+            spec = json.load(f)
+    spec["experiment"] = cli.experiment
+    spec.setdefault("mode", "eval")
+    spec.setdefault("cpu_type", ["o3"])
+    spec["points"] = sample(space, cli.method, cli.samples, cli.seed)
+
+    print(f"{len(spec['points'])} design points ({cli.method})",
+          file=sys.stderr)
+    text = json.dumps(spec, indent=2)
+    if cli.output:
+        with open(cli.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
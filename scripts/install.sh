@@ -27,14 +27,3 @@ echo "export PATH=$PATH:/usr/local/go/bin" >> ~/.bashrc
 
 go version
 
-
-ARCH="$(uname -m)"
-
-wget https://github.com/Nukesor/pueue/releases/download/v4.0.0/pueue-$ARCH-unknown-linux-musl
-wget https://github.com/Nukesor/pueue/releases/download/v4.0.0/pueued-$ARCH-unknown-linux-musl
-
-mv pueue-$ARCH-unknown-linux-musl /usr/local/bin/pueue
-mv pueued-$ARCH-unknown-linux-musl /usr/local/bin/pueued
-
-chmod +x /usr/local/bin/pueue
-chmod +x /usr/local/bin/pueued
\ No newline at end of file
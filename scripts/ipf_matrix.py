@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+# MIT License
+#
+# Copyright (c) 2025 Technical University of Munich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Instruction prefetcher matrix.
+
+Runs every workload with every given L1I prefetcher stack (`--ipf` of
+`fs-fdp.py`) and reports IPC, L1I MPKI and the prefetch accuracy and
+coverage per combination. Stacks containing `fdp` are run with the decoupled
+front-end enabled. The table is also written to `ipf-matrix.csv` in the
+experiment directory.
+
+Usage
+-----
+
+```
+python3 scripts/ipf_matrix.py -e ipf -w nodeapp mediawiki \\
+    --ipf none nextline tagged:degree=4 fdp fdp+tagged
+# Only report the results of a finished matrix
+python3 scripts/ipf_matrix.py -e ipf -w nodeapp mediawiki --report
+```
+
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+
+from sweep import (DEFAULT_MEM_PER_JOB, ISA_TO_ARCH, ROOT, default_sweep,
+                   expand, parse_value, run_jobs)
+
+from util.metrics import accumulate, ipc, l1i_mpki, measured_core, prefetch
+from util.prefetchers import uses_fdp
+from util.stats import load_stats
+
+
+COLUMNS = ["workload", "ipf", "ipc", "l1i_mpki",
+           "pf_issued", "pf_useful", "pf_accuracy", "pf_coverage"]
+
+
+def job_metrics(job) -> dict:
+    """Whole run metrics of a finished job. NaN if it has no stats."""
+    try:
+        total = accumulate(load_stats(job.outdir).blocks())
+    except FileNotFoundError:
+        return {c: math.nan for c in COLUMNS[2:]}
+    core = measured_core(total)
+    return {
+        "ipc": ipc(total, core),
+        "l1i_mpki": l1i_mpki(total, core),
+        **prefetch(total, core),
+    }
+
+
+def _fmt(v) -> str:
+    if isinstance(v, float):
+        return f"{v:.4f}" if abs(v) < 1000 or math.isnan(v) else f"{v:.0f}"
+    return str(v)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run and report an instruction prefetcher matrix"
+    )
+    parser.add_argument("-e", "--experiment", type=str, required=True,
+                        help="Name of the experiment.")
+    parser.add_argument("-w", "--workloads", type=str, nargs="+",
+                        required=True, help="Workloads to run.")
+    parser.add_argument("--ipf", type=str, nargs="+",
+                        default=["none", "tagged", "fdp", "fdp+tagged"],
+                        help="Prefetcher stacks to compare.")
+    parser.add_argument("--isa", type=str, default="X86",
+                        choices=ISA_TO_ARCH.keys(), help="ISA to run.")
+    parser.add_argument("-p", "--param", type=str, action="append",
+                        default=[],
+                        help="Further fs-fdp.py parameter for all jobs, "
+                             "given as <name>=<value>. Can be repeated.")
+    parser.add_argument("--gem5", type=str, default=None,
+                        help="Path to the gem5 binary.")
+    parser.add_argument("--mem-per-job", type=str,
+                        default=DEFAULT_MEM_PER_JOB,
+                        help="Host memory reserved per job.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Maximum number of parallel jobs.")
+    parser.add_argument("--report", action="store_true", default=False,
+                        help="Do not run, only report existing results.")
+    parser.add_argument("--dry-run", action="store_true", default=False,
+                        help="Only print the jobs.")
+    cli = parser.parse_args()
+
+    params = {}
+    for param in cli.param:
+        key, _, value = param.partition("=")
+        params[key] = parse_value(value)
+
+    sweep = default_sweep() | {
+        "experiment": cli.experiment,
+        "workloads": cli.workloads,
+        "isa": [cli.isa],
+        "mem_per_job": cli.mem_per_job,
+        "points": [params | {"ipf": ipf, "fdp": uses_fdp(ipf)}
+                   for ipf in cli.ipf],
+    }
+    if cli.gem5:
+        sweep["gem5"] = cli.gem5
+    jobs = expand(sweep)
+
+    if cli.dry_run:
+        for job in jobs:
+            print(f"{job.name}: {' '.join(job.cmd)}")
+        sys.exit(0)
+
+    if not cli.report:
+        run_jobs(jobs, cli.jobs)
+
+    rows = []
+    for job in jobs:
+        rows.append({"workload": job.workload, "ipf": job.params["ipf"]}
+                    | job_metrics(job))
+
+    print(" ".join(f"{c:>12}" for c in COLUMNS))
+    for row in rows:
+        print(" ".join(f"{_fmt(row[c]):>12}" for c in COLUMNS))
+
+    out = ROOT / sweep["results"] / ISA_TO_ARCH[cli.isa] / cli.experiment
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / "ipf-matrix.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(out / "ipf-matrix.json", "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Written to {out / 'ipf-matrix.csv'}")
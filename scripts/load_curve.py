@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+# MIT License
+#
+# Copyright (c) 2025 Technical University of Munich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Load curves of the HTTP workloads.
+
+The load level (client concurrency and optionally a fixed request rate) is
+part of the run script and therefore of the checkpoint. For every load level
+this script first takes the checkpoint (setup jobs are skipped by
+`fs-fdp.py` if the checkpoint exists) and then runs the evaluation. It
+reports IPC, L1I and branch MPKI, the fraction of cycles fetch stalled on
+the L1I and, with `--latency-hist`, the p50 and p99 request latency per
+workload and load level, and writes them to `load-curve.csv` in the
+experiment directory. The histogram is part of the checkpoint, so
+`--latency-hist` applies to the setup and the eval jobs. If the eval stops
+before the client is done, the latencies cover the requests the client
+measured up to its last copy of the histogram.
+
+Further fs-fdp.py parameters are given with `-p` for the eval jobs only or
+with `-s` for the setup and the eval jobs. Parameters that change the
+checkpoint (e.g. `num-cores`, `mem-size` or `roi-interval`) must be given
+with `-s`, otherwise the eval jobs find no checkpoint.
+
+Usage
+-----
+
+```
+python3 scripts/load_curve.py -e load -w nodeapp mediawiki \\
+    --concurrency 1 2 4 8 [--rate 0 200 400] [--latency-hist] [-p fdp=true] \\
+    [-s num-cores=4]
+```
+
+"""
+import argparse
+import csv
+import itertools
+import math
+import sys
+
+from sweep import (DEFAULT_MEM_PER_JOB, ISA_TO_ARCH, ROOT, default_sweep,
+                   expand, parse_value, run_jobs)
+
+from util.latency import load_latency
+from util.metrics import (accumulate, branch_mpki, icache_stall, ipc,
+                          l1i_mpki, measured_core)
+from util.stats import load_stats
+
+
+# fs-fdp.py parameters that are part of the checkpoint.
+CHECKPOINT_PARAMS = ["kernel", "disk", "num-cores", "server-cores", "mem-size",
+                     "roi-interval", "concurrency", "invocations", "warming",
+                     "rate", "latency-hist"]
+
+COLUMNS = ["workload", "concurrency", "rate", "ipc", "l1i_mpki",
+           "branch_mpki", "icache_stall", "p50_us", "p99_us"]
+
+
+def job_metrics(job) -> dict:
+    try:
+        total = accumulate(load_stats(job.outdir).blocks())
+    except FileNotFoundError:
+        return {c: math.nan for c in COLUMNS[3:]}
+    core = measured_core(total)
+    try:
+        latency = load_latency(job.outdir)
+        p50, p99 = latency.percentile(50), latency.percentile(99)
+    except FileNotFoundError:
+        p50, p99 = math.nan, math.nan
+    return {
+        "ipc": ipc(total, core),
+        "l1i_mpki": l1i_mpki(total, core),
+        "branch_mpki": branch_mpki(total, core),
+        "icache_stall": icache_stall(total, core),
+        "p50_us": p50,
+        "p99_us": p99,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run and report load curves of the HTTP workloads"
+    )
+    parser.add_argument("-e", "--experiment", type=str, required=True,
+                        help="Name of the experiment.")
+    parser.add_argument("-w", "--workloads", type=str, nargs="+",
+                        required=True, help="Workloads to run.")
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 2, 4, 8],
+                        help="Client concurrency levels.")
+    parser.add_argument("--rate", type=int, nargs="+", default=[0],
+                        help="Request rates in requests per simulated "
+                             "second. 0 sends requests back to back.")
+    parser.add_argument("--isa", type=str, default="X86",
+                        choices=ISA_TO_ARCH.keys(), help="ISA to run.")
+    parser.add_argument("--latency-hist", action="store_true",
+                        default=False,
+                        help="Record the request latencies and report p50 "
+                             "and p99.")
+    parser.add_argument("-p", "--param", type=str, action="append",
+                        default=[],
+                        help="Further fs-fdp.py parameter of the eval jobs, "
+                             "given as <name>=<value>. Can be repeated.")
+    parser.add_argument("-s", "--setup-param", type=str, action="append",
+                        default=[],
+                        help="Further fs-fdp.py parameter of the setup and "
+                             "the eval jobs, given as <name>=<value>. "
+                             "Needed for parameters that change the "
+                             "checkpoint. Can be repeated.")
+    parser.add_argument("--gem5", type=str, default=None,
+                        help="Path to the gem5 binary.")
+    parser.add_argument("--mem-per-job", type=str,
+                        default=DEFAULT_MEM_PER_JOB,
+                        help="Host memory reserved per job.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Maximum number of parallel jobs.")
+    parser.add_argument("--report", action="store_true", default=False,
+                        help="Do not run, only report existing results.")
+    parser.add_argument("--dry-run", action="store_true", default=False,
+                        help="Only print the jobs.")
+    cli = parser.parse_args()
+
+    params, setup_params = {}, {}
+    for args, values in [(cli.param, params),
+                         (cli.setup_param, setup_params)]:
+        for param in args:
+            key, _, value = param.partition("=")
+            values[key] = parse_value(value)
+    for key in params:
+        if key in CHECKPOINT_PARAMS:
+            sys.exit(f"{key} is part of the checkpoint, give it with -s")
+    for key in ["concurrency", "rate", "latency-hist"]:
+        if key in setup_params:
+            sys.exit(f"{key} is set by --{key}")
+
+    levels = [setup_params | {"concurrency": c, "rate": r or None,
+                              "latency-hist": cli.latency_hist}
+              for c, r in itertools.product(cli.concurrency, cli.rate)]
+    base = default_sweep() | {
+        "workloads": cli.workloads,
+        "isa": [cli.isa],
+        "mem_per_job": cli.mem_per_job,
+    }
+    if cli.gem5:
+        base["gem5"] = cli.gem5
+    setup = expand(base | {"experiment": f"setup-{cli.experiment}",
+                           "mode": "setup",
+                           "points": levels})
+    jobs = expand(base | {"experiment": cli.experiment,
+                          "points": [params | level for level in levels]})
+
+    if cli.dry_run:
+        for job in setup + jobs:
+            print(f"{job.name}: {' '.join(job.cmd)}")
+        sys.exit(0)
+
+    if not cli.report:
+        if not run_jobs(setup, cli.jobs):
+            sys.exit("Taking the checkpoints failed")
+        run_jobs(jobs, cli.jobs)
+
+    rows = []
+    for job in jobs:
+        rows.append({
+            "workload": job.workload,
+            "concurrency": job.params["concurrency"],
+            "rate": job.params["rate"] or 0,
+        } | job_metrics(job))
+
+    print(" ".join(f"{c:>12}" for c in COLUMNS))
+    for row in rows:
+        print(" ".join(f"{row[c]:>12.4f}" if isinstance(row[c], float)
+                       else f"{row[c]:>12}" for c in COLUMNS))
+
+    out = ROOT / base["results"] / ISA_TO_ARCH[cli.isa] / cli.experiment
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / "load-curve.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Written to {out / 'load-curve.csv'}")
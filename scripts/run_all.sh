@@ -59,44 +59,15 @@ else
     exit 1
 fi
 
-KERNEL="./wkdir/$ARCH/kernel"
-DISK_IMAGE="./wkdir/$ARCH/disk.img"
-
 EXPERIMENT="$1"
 
-# Define the output file of your run
-RESULTS_DIR="./results/$ARCH/$EXPERIMENT"
-
-if ! pgrep -x "pueued" > /dev/null
-then
-    pueued -d
-fi
-
-PGROUP="$ARCH-$EXPERIMENT"
-
-pueue group add -p 100 "$PGROUP" || true
-
 sudo chown $(id -u) /dev/kvm
 
-
-for bm in "${BENCHMARKS[@]}"; 
-do
-    OUTDIR=$RESULTS_DIR/${bm}/
-
-    ## Create output directory
-    mkdir -p $OUTDIR
-
-    pueue add -g "$PGROUP" -l "$EXPERIMENT-$bm" -- "$GEM5 \
-        --outdir=$OUTDIR \
-            $GEM5_CONFIG \
-                --kernel $KERNEL \
-                --disk $DISK_IMAGE \
-                --workload ${bm} \
-                --isa $ISA \
-                --cpu-type $CPU_TYPE \
-                --mode=eval \
-            > $OUTDIR/gem5.log 2>&1"
-
-done
-
-
+python3 ./scripts/sweep.py \
+    --gem5 $GEM5 \
+    --config $GEM5_CONFIG \
+    --experiment $EXPERIMENT \
+    --mode eval \
+    --isa $ISA \
+    --cpu-type $CPU_TYPE \
+    --workloads "${BENCHMARKS[@]}"
@@ -59,40 +59,21 @@ else
 fi
 
 
-KERNEL="./wkdir/$ARCH/kernel"
-DISK_IMAGE="./wkdir/$ARCH/disk.img"
-
-RESULTS_DIR="./results/$ARCH/setup"
-
-if ! pgrep -x "pueued" > /dev/null
-then
-    pueued -d
-fi
-
-PGROUP="setup-$ARCH"
-
-pueue group add -p 100 "$PGROUP" || true
-
 sudo chown $(id -u) /dev/kvm
 
-for bm in "${BENCHMARKS[@]}";
-do
-    OUTDIR=$RESULTS_DIR/${bm}/
-
-    ## Create output directory
-    mkdir -p $OUTDIR
-
-
-    pueue add -g "$PGROUP" -l "setup-$bm" -- "$GEM5 \
-        --outdir=$OUTDIR \
-            $GEM5_CONFIG \
-                --kernel $KERNEL \
-                --disk $DISK_IMAGE \
-                --workload ${bm} \
-                --isa $ISA \
-                --mode=setup \
-            > $OUTDIR/gem5.log 2>&1"
-
-done
-
-
+# Boot linux once. All setups below start from the boot checkpoint.
+python3 ./scripts/sweep.py \
+    --gem5 $GEM5 \
+    --config $GEM5_CONFIG \
+    --experiment boot \
+    --mode boot \
+    --isa $ISA \
+    --workloads "${BENCHMARKS[0]}"
+
+python3 ./scripts/sweep.py \
+    --gem5 $GEM5 \
+    --config $GEM5_CONFIG \
+    --experiment setup \
+    --mode setup \
+    --isa $ISA \
+    --workloads "${BENCHMARKS[@]}"
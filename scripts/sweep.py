@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+
+# MIT License
+#
+# Copyright (c) 2025 Technical University of Munich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Sweep scheduler for gem5 simulations.
+
+A sweep is the cross product of workloads x ISA x cpu-type x fdp and any
+number of additional `fs-fdp.py` parameters. Instead of a cross product of
+parameters the spec can also list `points`, where every point is a dict of
+parameters (see `scripts/dse.py`). Every combination becomes one gem5 job
+with its own output directory `results/<arch>/<experiment>/<job>/`. The
+parameters of a job are written to `params.json` in its output directory.
+
+The state of every job (running, done or failed with the exit cause gem5
+reported) is kept in `status.json` in its output directory together with a
+hash of its command line. A job that is done with the same hash is skipped
+when the sweep is run again, so an interrupted sweep resumes where it stopped
+(`--force` runs all jobs again). Failed jobs are retried `--retries` times,
+the delay doubles with every attempt.
+
+Jobs are started as long as the host has memory left for them. Each job
+reserves `--mem-per-job` (the simulated memory plus the gem5 overhead). A job
+is only admitted if the reservations of all running jobs fit into the memory
+limit *and* the currently available host memory covers the new job plus the
+part of the running jobs' reservations they did not touch yet. This way a
+burst of freshly started simulations cannot overcommit the host before their
+memory is actually allocated.
+
+The sweep can be given as a JSON spec file and/or on the command line. Values
+given on the command line replace the ones of the spec file.
+
+```json
+{
+    "experiment": "fdp",
+    "mode": "eval",
+    "workloads": ["nodeapp", "mediawiki"],
+    "isa": ["X86"],
+    "cpu_type": ["o3"],
+    "fdp": [false, true],
+    "params": {"sp-warmup": [1000000, 10000000]},
+    "points": [{"rob-entries": 256}, {"rob-entries": 576, "iq-entries": 128}]
+}
+```
+
+Usage
+-----
+
+```
+python3 scripts/sweep.py --experiment <name> [--spec <sweep.json>]
+    [--workloads <bm> ...] [--isa <isa> ...] [--cpu-type <cpu> ...]
+    [--fdp on|off|both] [--param <name>=<v1>,<v2> ...] [--dry-run]
+    [--retries <n>] [--retry-delay <s>] [--force] [--status]
+```
+
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "gem5-configs"))
+
+from util.workloads import wlcfg
+
+
+ISA_TO_ARCH = {
+    "X86": "amd64",
+    "Arm": "arm64",
+    "RiscV": "riscv",
+}
+
+# Simulated memory of fs-fdp.py plus headroom for gem5 itself.
+DEFAULT_MEM_PER_JOB = "4GiB"
+
+STATUS = "status.json"
+# Outputs of an earlier attempt that would be mixed up with the new ones.
+STALE_OUTPUTS = ["stats.txt", "stats.cols", "stats.h5", "roi.csv",
+                 "latency.hist", "exit.json"]
+
+_UNITS = {
+    "": 1, "B": 1,
+    "KiB": 1 << 10, "MiB": 1 << 20, "GiB": 1 << 30, "TiB": 1 << 40,
+    "kB": 10**3, "KB": 10**3, "MB": 10**6, "GB": 10**9, "TB": 10**12,
+}
+
+
+def parse_size(size) -> int:
+    """Convert a size like `3GiB` or `512MB` into bytes."""
+    if isinstance(size, int):
+        return size
+    m = re.fullmatch(r"\s*([\d.]+)\s*([A-Za-z]*)\s*", str(size))
+    if m is None or m.group(2) not in _UNITS:
+        raise ValueError(f"Invalid size: {size}")
+    return int(float(m.group(1)) * _UNITS[m.group(2)])
+
+
+def meminfo() -> dict:
+    """Host memory from /proc/meminfo in bytes."""
+    info = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            info[key] = int(value.split()[0]) * 1024
+    return info
+
+
+def rss(pid: int) -> int:
+    """Resident memory of a process in bytes. 0 if it already exited."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class Job:
+    """A single gem5 invocation of the sweep."""
+
+    def __init__(self, name, workload, isa, cpu_type, fdp, params, sweep):
+        self.name = name
+        self.workload = workload
+        self.isa = isa
+        self.arch = ISA_TO_ARCH[isa]
+        self.cpu_type = cpu_type
+        self.fdp = fdp
+        self.params = params
+        self.mode = sweep["mode"]
+        self.mem = parse_size(sweep["mem_per_job"])
+        self.outdir = (ROOT / sweep["results"] / self.arch
+                       / sweep["experiment"] / name)
+        self.proc = None
+        self.started = None
+        self.attempts = 0
+
+        self.cmd = [
+            sweep["gem5"],
+            f"--outdir={self.outdir}",
+            sweep["config"],
+            "--kernel", f"./wkdir/{self.arch}/kernel",
+            "--disk", f"./wkdir/{self.arch}/disk.img",
+            "--workload", workload,
+            "--isa", isa,
+            f"--mode={self.mode}",
+        ]
+        if self.mode not in ["setup", "boot"]:
+            self.cmd += ["--cpu-type", cpu_type]
+            if fdp:
+                self.cmd += ["--fdp"]
+        for key, value in params.items():
+            if value is True:
+                self.cmd += [f"--{key}"]
+            elif value is not False and value is not None:
+                self.cmd += [f"--{key}", str(value)]
+
+    def config_hash(self) -> str:
+        return hashlib.sha256(json.dumps(self.cmd).encode()).hexdigest()[:16]
+
+    def status(self) -> dict:
+        try:
+            with open(self.outdir / STATUS) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"state": "pending"}
+
+    def write_status(self, state: str, **fields) -> None:
+        status = {
+            "state": state,
+            "hash": self.config_hash(),
+            "attempts": self.attempts,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S",
+                                     time.localtime(self.started)),
+        } | fields
+        tmp = self.outdir / (STATUS + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(status, f, indent=2)
+        tmp.replace(self.outdir / STATUS)
+
+    def completed(self) -> bool:
+        """Done in an earlier sweep with the same command line."""
+        status = self.status()
+        return (status["state"] == "done"
+                and status.get("hash") == self.config_hash())
+
+    def exit_cause(self, rc: int) -> str:
+        """Why gem5 stopped: the cause of its last exit event if it got
+        that far, otherwise the exit code or signal."""
+        try:
+            with open(self.outdir / "exit.json") as f:
+                cause = json.load(f)["cause"]
+        except (OSError, ValueError, KeyError):
+            cause = None
+        if rc < 0:
+            return f"killed by {signal.Signals(-rc).name}"
+        if rc != 0 and cause:
+            return f"exit code {rc} after '{cause}'"
+        return cause or f"exit code {rc}"
+
+    def start(self) -> None:
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        for name in STALE_OUTPUTS:
+            (self.outdir / name).unlink(missing_ok=True)
+        if self.attempts > 0:
+            log = self.outdir / "gem5.log"
+            if log.exists():
+                log.rename(self.outdir / f"gem5.log.{self.attempts}")
+        self.attempts += 1
+        with open(self.outdir / "cmd.txt", "w") as f:
+            f.write(" ".join(self.cmd) + "\n")
+        with open(self.outdir / "params.json", "w") as f:
+            json.dump({
+                "workload": self.workload,
+                "isa": self.isa,
+                "cpu_type": self.cpu_type,
+                "fdp": self.fdp,
+                "mode": self.mode,
+                "params": self.params,
+            }, f, indent=2)
+        log = open(self.outdir / "gem5.log", "w")
+        self.proc = subprocess.Popen(
+            self.cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT,
+        )
+        log.close()
+        self.started = time.time()
+        self.write_status("running")
+
+    def finish(self, rc: int) -> None:
+        self.write_status(
+            "done" if rc == 0 else "failed",
+            finished=time.strftime("%Y-%m-%d %H:%M:%S"),
+            exit_code=rc,
+            cause=self.exit_cause(rc),
+        )
+
+    def unclaimed(self) -> int:
+        """Part of the memory reservation the job did not allocate yet."""
+        return max(self.mem - rss(self.proc.pid), 0)
+
+
+def expand(sweep: dict) -> list:
+    """Expand the sweep spec into the list of jobs. Only the dimensions
+    with more than one value appear in the job names."""
+    params = sweep["params"]
+    points = sweep.get("points") or [{}]
+    dims = [
+        ("workload", sweep["workloads"]),
+        ("isa", sweep["isa"]),
+        ("cpu_type", sweep["cpu_type"]),
+        ("fdp", sweep["fdp"]),
+        ("point", list(range(len(points)))),
+    ] + [(key, values) for key, values in params.items()]
+
+    jobs = []
+    for point in itertools.product(*[values for _, values in dims]):
+        point = dict(zip([key for key, _ in dims], point))
+        parts = [point["workload"]]
+        if len(sweep["isa"]) > 1:
+            parts.append(point["isa"])
+        if len(sweep["cpu_type"]) > 1:
+            parts.append(point["cpu_type"])
+        if len(sweep["fdp"]) > 1:
+            parts.append("fdp" if point["fdp"] else "nofdp")
+        if len(points) > 1:
+            parts.append(f"p{point['point']:03d}")
+        for key, values in params.items():
+            if len(values) > 1:
+                parts.append(f"{key}{point[key]}")
+
+        jobs.append(Job(
+            "-".join(parts), point["workload"], point["isa"],
+            point["cpu_type"], point["fdp"],
+            points[point["point"]] | {key: point[key] for key in params},
+            sweep,
+        ))
+    return jobs
+
+
+class Scheduler:
+    """Runs jobs with a bound on the number of parallel jobs and on the
+    memory they may use."""
+
+    def __init__(self, jobs, max_jobs: int, mem_limit: int, headroom: int,
+                 retries: int = 0, retry_delay: float = 30.0,
+                 poll: float = 2.0):
+        self.pending = deque(jobs)
+        self.running = []
+        # Failed jobs waiting for their retry: (time, job).
+        self.waiting = []
+        self.done = []
+        self.failed = []
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_jobs = max_jobs
+        self.mem_limit = mem_limit
+        self.headroom = headroom
+        self.poll = poll
+
+    def reserved(self) -> int:
+        return sum(job.mem for job in self.running)
+
+    def can_admit(self, job: Job) -> bool:
+        if len(self.running) >= self.max_jobs:
+            return False
+        if self.running and self.reserved() + job.mem > self.mem_limit:
+            return False
+        available = meminfo()["MemAvailable"]
+        available -= sum(j.unclaimed() for j in self.running)
+        # Always admit a job if nothing is running to guarantee progress.
+        return not self.running or available >= job.mem + self.headroom
+
+    def reap(self) -> None:
+        for job in list(self.running):
+            rc = job.proc.poll()
+            if rc is None:
+                continue
+            self.running.remove(job)
+            elapsed = time.time() - job.started
+            job.finish(rc)
+            if rc == 0:
+                self.done.append(job)
+                print(f"[done]    {job.name} ({elapsed:.0f}s)")
+                continue
+            cause = job.status()["cause"]
+            if job.attempts <= self.retries:
+                delay = self.retry_delay * 2 ** (job.attempts - 1)
+                self.waiting.append((time.time() + delay, job))
+                print(f"[retry]   {job.name} {cause} ({elapsed:.0f}s), "
+                      f"attempt {job.attempts + 1} in {delay:.0f}s")
+            else:
+                self.failed.append(job)
+                print(f"[failed]  {job.name} {cause} ({elapsed:.0f}s),"
+                      f" see {job.outdir}/gem5.log")
+
+    def requeue(self) -> None:
+        now = time.time()
+        for entry in list(self.waiting):
+            if entry[0] <= now:
+                self.waiting.remove(entry)
+                self.pending.append(entry[1])
+
+    def run(self) -> bool:
+        total = len(self.pending)
+        try:
+            while self.pending or self.running or self.waiting:
+                self.reap()
+                self.requeue()
+                while self.pending and self.can_admit(self.pending[0]):
+                    job = self.pending.popleft()
+                    job.start()
+                    self.running.append(job)
+                    print(f"[started] {job.name} "
+                          f"({len(self.running)} running, "
+                          f"{len(self.pending)} pending)")
+                time.sleep(self.poll)
+        except KeyboardInterrupt:
+            print("Interrupted, stopping running jobs...")
+            for job in self.running:
+                job.proc.terminate()
+            for job in self.running:
+                job.finish(job.proc.wait())
+            raise
+
+        print(f"Finished {len(self.done)}/{total} jobs, "
+              f"{len(self.failed)} failed.")
+        for job in self.failed:
+            print(f"  {job.name}: {job.outdir}")
+        return not self.failed
+
+
+def run_jobs(jobs, max_jobs=None, mem_limit=None, headroom="2GiB",
+             retries=2, retry_delay=30.0, force=False) -> bool:
+    """Run the jobs with the scheduler. Jobs completed by an earlier run
+    are skipped unless `force` is given. Returns False if any job
+    failed."""
+    if not force:
+        skipped = [job for job in jobs if job.completed()]
+        if skipped:
+            print(f"Skipping {len(skipped)} jobs that are already done")
+        jobs = [job for job in jobs if job not in skipped]
+    max_jobs = max_jobs or os.cpu_count()
+    mem_limit = (parse_size(mem_limit) if mem_limit
+                 else int(meminfo()["MemTotal"] * 0.9))
+    print(f"Running {len(jobs)} jobs, at most {max_jobs} in parallel, "
+          f"memory limit {mem_limit / (1 << 30):.1f}GiB")
+    return Scheduler(jobs, max_jobs, mem_limit, parse_size(headroom),
+                     retries, retry_delay).run()
+
+
+def print_status(jobs) -> None:
+    for job in jobs:
+        status = job.status()
+        state = status["state"]
+        if state != "pending" and status.get("hash") != job.config_hash():
+            state = "changed"
+        print(f"{job.name:<40} {state:<8} {status.get('attempts', 0):>3} "
+              f"{status.get('cause', '')}")
+
+
+def parse_value(value: str):
+    """Interpret a parameter value from the command line."""
+    if value.lower() in ["true", "false"]:
+        return value.lower() == "true"
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def default_sweep() -> dict:
+    return {
+        "experiment": None,
+        "mode": "eval",
+        "workloads": list(wlcfg.keys()),
+        "isa": ["X86"],
+        "cpu_type": ["o3"],
+        "fdp": [False],
+        "params": {},
+        "points": [],
+        "gem5": "./../build/ALL/gem5.opt",
+        "config": "./gem5-configs/fs-fdp.py",
+        "results": "./results",
+        "mem_per_job": DEFAULT_MEM_PER_JOB,
+    }
+
+
+def load_sweep(cli) -> dict:
+    sweep = default_sweep()
+    if cli.spec:
+        with open(cli.spec) as f:
+            sweep |= json.load(f)
+
+    for key in ["experiment", "mode", "workloads", "isa", "cpu_type",
+                "gem5", "config", "results", "mem_per_job"]:
+        value = getattr(cli, key)
+        if value is not None:
+            sweep[key] = value
+    if cli.fdp is not None:
+        sweep["fdp"] = {"on": [True], "off": [False], "both": [False, True]}[cli.fdp]
+    for param in cli.param:
+        key, _, values = param.partition("=")
+        sweep["params"][key] = [parse_value(v) for v in values.split(",")]
+
+    if sweep["experiment"] is None:
+        sweep["experiment"] = "setup" if sweep["mode"] == "setup" else None
+    if sweep["experiment"] is None:
+        raise SystemExit("No experiment name given")
+    for key in ["workloads", "isa", "cpu_type", "fdp"]:
+        if not isinstance(sweep[key], list):
+            sweep[key] = [sweep[key]]
+    for key, values in sweep["params"].items():
+        if not isinstance(values, list):
+            sweep["params"][key] = [values]
+    unknown = set(sweep["workloads"]) - set(wlcfg.keys())
+    if unknown:
+        raise SystemExit(f"Unknown workloads: {', '.join(sorted(unknown))}")
+    return sweep
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a sweep of gem5 simulations"
+    )
+    parser.add_argument("--spec", type=str, default=None,
+                        help="JSON file describing the sweep.")
+    parser.add_argument("-e", "--experiment", type=str, default=None,
+                        help="Name of the experiment (results sub directory).")
+    parser.add_argument("--mode", type=str, default=None,
+                        choices=["setup", "eval", "profile", "simpoints",
+                                 "boot"],
+                        help="Mode passed to the gem5 config.")
+    parser.add_argument("-w", "--workloads", type=str, nargs="+",
+                        default=None, help="Workloads to run.")
+    parser.add_argument("--isa", type=str, nargs="+", default=None,
+                        choices=ISA_TO_ARCH.keys(), help="ISAs to run.")
+    parser.add_argument("--cpu-type", dest="cpu_type", type=str, nargs="+",
+                        default=None, help="CPU models to run.")
+    parser.add_argument("--fdp", type=str, default=None,
+                        choices=["on", "off", "both"],
+                        help="Run with FDP enabled, disabled or both.")
+    parser.add_argument("-p", "--param", type=str, action="append",
+                        default=[],
+                        help="Additional config parameter to sweep, given as "
+                             "<name>=<v1>,<v2>,... Can be repeated.")
+    parser.add_argument("--gem5", type=str, default=None,
+                        help="Path to the gem5 binary.")
+    parser.add_argument("--config", type=str, default=None,
+                        help="gem5 config script.")
+    parser.add_argument("--results", type=str, default=None,
+                        help="Results base directory.")
+    parser.add_argument("--mem-per-job", dest="mem_per_job", type=str,
+                        default=None,
+                        help=f"Host memory reserved per job "
+                             f"(default {DEFAULT_MEM_PER_JOB}).")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Maximum number of parallel jobs.")
+    parser.add_argument("--mem-limit", type=str, default=None,
+                        help="Memory all jobs together may use. "
+                             "Defaults to 90%% of the host memory.")
+    parser.add_argument("--headroom", type=str, default="2GiB",
+                        help="Host memory that is always kept free.")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="How often a failed job is started again.")
+    parser.add_argument("--retry-delay", type=float, default=30.0,
+                        help="Seconds before the first retry of a failed "
+                             "job, doubled for every further retry.")
+    parser.add_argument("--force", action="store_true", default=False,
+                        help="Also run the jobs that are already done.")
+    parser.add_argument("--status", action="store_true", default=False,
+                        help="Only print the state of the jobs.")
+    parser.add_argument("--dry-run", action="store_true", default=False,
+                        help="Only print the jobs.")
+    cli = parser.parse_args()
+
+    sweep = load_sweep(cli)
+    jobs = expand(sweep)
+
+    if cli.dry_run:
+        for job in jobs:
+            print(f"{job.name}: {' '.join(job.cmd)}")
+        sys.exit(0)
+    if cli.status:
+        print_status(jobs)
+        sys.exit(0)
+
+    ok = run_jobs(jobs, cli.jobs, cli.mem_limit, cli.headroom,
+                  cli.retries, cli.retry_delay, cli.force)
+    sys.exit(0 if ok else 1)